@@ -23,6 +23,17 @@ def setup_database():
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
+    # WAL persists in the database file, so the API workers inherit it;
+    # the remaining pragmas tune this connection
+    cursor.executescript("""
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        PRAGMA busy_timeout=5000;
+        PRAGMA cache_size=-65536;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA mmap_size=268435456;
+    """)
+    
     # Create basic tables
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS posts (
@@ -50,6 +61,26 @@ def setup_database():
         )
     ''')
     
+    # Posts are looked up by (platform, post_id), and the unique index lets the
+    # bulk inserts skip duplicates; keywords.term is already indexed by its UNIQUE
+    # constraint. Databases created before the index may hold duplicate posts,
+    # so keep the first copy of each before creating it.
+    has_index = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_posts_platform_post_id'"
+    ).fetchone()
+    if not has_index:
+        removed = cursor.execute('''
+            DELETE FROM posts WHERE id NOT IN (
+                SELECT MIN(id) FROM posts GROUP BY platform, post_id
+            )
+        ''').rowcount
+        if removed:
+            print(f"Removed {removed} duplicate posts")
+        cursor.execute('''
+            CREATE UNIQUE INDEX idx_posts_platform_post_id
+            ON posts(platform, post_id)
+        ''')
+    
     conn.commit()
     conn.close()
     print("Database setup completed")
@@ -69,11 +100,16 @@ def run_application():
     # Set environment variables
     os.environ.setdefault('PYTHONPATH', str(Path.cwd()))
     
-    # Run the application
+    # Run the application with auto-reload; set WEB_CONCURRENCY for multiple workers
+    # instead (uvicorn doesn't allow both). "auto" picks uvloop/httptools when installed
+    workers = os.environ.get('WEB_CONCURRENCY')
+    mode = ["--workers", workers] if workers else ["--reload"]
     subprocess.run([
         sys.executable, "-m", "uvicorn", 
         "src.mcp.fastapi_app.main:app", 
-        "--reload", 
+        *mode,
+        "--loop", "auto",
+        "--http", "auto",
         "--port", "8000"
     ])
 
@@ -2,6 +2,8 @@
 Sliding Window Context Manager
 Manages context with intelligent pruning to prevent overflow
 """
+import hashlib
+import itertools
 import logging
 from collections import deque
 from typing import Dict, Any, Optional, Union
@@ -9,6 +11,21 @@ from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+def estimate_tokens(content: Any) -> int:
+    """Rough token estimate (~4 chars per token) without stringifying containers"""
+    return _estimate_chars(content) // 4
+
+def _estimate_chars(content: Any) -> int:
+    """Approximate len(str(content)) by walking dicts/lists instead of rendering them"""
+    if isinstance(content, str):
+        return len(content)
+    if isinstance(content, dict):
+        # Quotes plus ': ' and ', ' separators cost roughly 6 chars per item
+        return sum(_estimate_chars(k) + _estimate_chars(v) + 6 for k, v in content.items())
+    if isinstance(content, (list, tuple, set)):
+        return sum(_estimate_chars(item) + 2 for item in content)
+    return len(str(content))
+
 @dataclass
 class ContextConfig:
     """Configuration for Context Manager"""
@@ -22,26 +39,37 @@ class SlidingWindowContextManager:
     def __init__(self, config: Optional[ContextConfig] = None):
         self.config = config or ContextConfig()
         self.context_window = deque(maxlen=self.config.max_context_items)
-        self.priority_context: Dict[str, Any] = {}  # Always retained
+        self.priority_context: Dict[bytes, Any] = {}  # Always retained, keyed by content digest
         self.token_count = 0
+        # Running token totals so get_total_tokens() never rescans
+        self._window_tokens = 0
+        self._priority_tokens = 0
         self.logger = logging.getLogger(__name__)
         
-    def add_context(self, content: Union[str, Dict[str, Any]], priority: str = "normal") -> None:
-        """Add context with intelligent pruning"""
-        # Convert content to string for token estimation
-        content_str = str(content) if not isinstance(content, str) else content
-        content_tokens = len(content_str) // 4  # Rough token estimation
+    def add_context(self, content: Union[str, Dict[str, Any]], priority: str = "normal",
+                    tokens: Optional[int] = None) -> None:
+        """Add context with intelligent pruning; pass tokens when already known"""
+        content_tokens = tokens if tokens is not None else estimate_tokens(content)
         
         if priority == "critical":
             # Add to priority context (never pruned)
-            content_hash = hash(content_str)
-            self.priority_context[content_hash] = {
+            content_str = str(content) if not isinstance(content, str) else content
+            # Stable across processes, unlike the seeded built-in hash()
+            digest = hashlib.blake2b(content_str.encode(), digest_size=8).digest()
+            if digest in self.priority_context:
+                # Already retained; nothing new to add
+                return
+            self._priority_tokens += content_tokens
+            self.priority_context[digest] = {
                 "content": content,
                 "tokens": content_tokens,
                 "added_at": self.token_count
             }
         else:
-            # Add to sliding window
+            # Add to sliding window; a full deque evicts its oldest item on append
+            if len(self.context_window) == self.context_window.maxlen:
+                self._window_tokens -= self.context_window[0]["tokens"]
+            self._window_tokens += content_tokens
             self.context_window.append({
                 "content": content,
                 "tokens": content_tokens,
@@ -64,6 +92,7 @@ class SlidingWindowContextManager:
                 # Remove oldest non-critical item
                 removed = self.context_window.popleft()
                 self.token_count -= removed["tokens"]
+                self._window_tokens -= removed["tokens"]
                 self.logger.debug(f"Pruned context item: {removed['tokens']} tokens")
             else:
                 # No more items to prune
@@ -72,13 +101,7 @@ class SlidingWindowContextManager:
     
     def get_total_tokens(self) -> int:
         """Get total token count including priority context"""
-        # Count tokens in sliding window
-        window_tokens = sum(item["tokens"] for item in self.context_window)
-        
-        # Count tokens in priority context
-        priority_tokens = sum(item["tokens"] for item in self.priority_context.values())
-        
-        return window_tokens + priority_tokens
+        return self._window_tokens + self._priority_tokens
     
     def get_context_snapshot(self) -> Dict[str, Any]:
         """Get a snapshot of current context"""
@@ -87,7 +110,8 @@ class SlidingWindowContextManager:
             "window_items": len(self.context_window),
             "priority_items": len(self.priority_context),
             "priority_context": list(self.priority_context.values()),
-            "recent_context": list(self.context_window)[-10:] if self.context_window else []
+            # Walk back from the right end instead of copying the whole deque
+            "recent_context": list(itertools.islice(reversed(self.context_window), 10))[::-1]
         }
     
     def clear_context(self) -> None:
@@ -95,6 +119,8 @@ class SlidingWindowContextManager:
         self.context_window.clear()
         self.priority_context.clear()
         self.token_count = 0
+        self._window_tokens = 0
+        self._priority_tokens = 0
         self.logger.info("Context cleared")
     
     def get_relevant_context(self, query: str = "", max_tokens: Optional[int] = None) -> Dict[str, Any]:
@@ -107,31 +133,36 @@ class SlidingWindowContextManager:
             "window": []
         }
         
-        current_tokens = sum(item["tokens"] for item in self.priority_context.values())
+        current_tokens = self._priority_tokens
+        
+        # Whole window fits within the budget, no per-item accounting needed
+        if current_tokens + self._window_tokens <= max_tokens:
+            relevant_context["window"] = list(reversed(self.context_window))
+            return relevant_context
         
         # Add window context items until we reach the limit
+        window = relevant_context["window"]
         for item in reversed(self.context_window):  # Most recent first
-            if current_tokens + item["tokens"] <= max_tokens:
-                relevant_context["window"].append(item)
-                current_tokens += item["tokens"]
-            else:
+            current_tokens += item["tokens"]
+            if current_tokens > max_tokens:
                 break
+            window.append(item)
         
         return relevant_context
     
     def remove_old_context(self, max_age: int) -> int:
         """Remove context items older than max_age token positions"""
         cutoff = self.token_count - max_age
-        removed_count = 0
         
-        # Remove from sliding window
-        new_window = deque()
-        for item in self.context_window:
-            if item["added_at"] >= cutoff:
-                new_window.append(item)
-            else:
-                removed_count += 1
-                self.token_count -= item["tokens"]
+        # Remove from sliding window; added_at is not monotonic (pruning lowers
+        # token_count), so check every item rather than stopping at the first
+        # recent one
+        kept = [item for item in self.context_window if item["added_at"] >= cutoff]
+        removed_count = len(self.context_window) - len(kept)
+        if removed_count:
+            removed_tokens = self._window_tokens - sum(item["tokens"] for item in kept)
+            self.token_count -= removed_tokens
+            self._window_tokens -= removed_tokens
+            self.context_window = deque(kept, maxlen=self.config.max_context_items)
         
-        self.context_window = new_window
         return removed_count
\ No newline at end of file
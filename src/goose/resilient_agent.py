@@ -3,7 +3,11 @@ Resilient Goose Agent Implementation
 Wrapper around GooseAgent with automatic recovery and resilience features
 """
 import asyncio
+import importlib.util
 import logging
+import random
+import time
+import weakref
 from datetime import datetime
 from typing import Dict, Any, Optional
 import httpx
@@ -11,6 +15,9 @@ from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# httpx negotiates HTTP/2 only when the h2 package (httpx[http2]) is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 @dataclass
 class ResilientAgentConfig:
     """Configuration for ResilientGooseAgent"""
@@ -18,6 +25,67 @@ class ResilientAgentConfig:
     timeout: int = 30
     heartbeat_interval: int = 10
     max_context_tokens: int = 100000
+    http2: bool = True
+    max_connections: int = 64
+    max_keepalive_connections: int = 32
+    keepalive_expiry: float = 60.0  # seconds
+    max_backoff: float = 30.0  # seconds, cap on a single reconnect delay
+    reconnect_cooldown: float = 30.0  # seconds to refuse reconnects after exhausting retries
+
+# Connection pools shared by every agent on an event loop with the same client
+# settings (see acquire_shared_client). Keyed by loop because a pool can't be
+# reused once its loop is closed, e.g. across CREScheduler jobs.
+_shared_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, list]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+def _client_settings(config: ResilientAgentConfig) -> tuple:
+    return (
+        config.timeout,
+        config.http2 and HTTP2_AVAILABLE,
+        config.max_connections,
+        config.max_keepalive_connections,
+        config.keepalive_expiry
+    )
+
+def _new_client(config: ResilientAgentConfig) -> httpx.AsyncClient:
+    # Heartbeats and tasks hit one host, so keep connections alive and reuse them
+    return httpx.AsyncClient(
+        timeout=config.timeout,
+        http2=config.http2 and HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=config.max_connections,
+            max_keepalive_connections=config.max_keepalive_connections,
+            keepalive_expiry=config.keepalive_expiry
+        )
+    )
+
+def acquire_shared_client(config: ResilientAgentConfig) -> httpx.AsyncClient:
+    """Return the client shared by agents with these settings on the running loop"""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return _new_client(config)  # no loop to share on; the agent owns this client
+    
+    clients = _shared_clients.setdefault(loop, {})
+    key = _client_settings(config)
+    entry = clients.get(key)
+    if entry is None or entry[0].is_closed:
+        entry = clients[key] = [_new_client(config), 0]
+    entry[1] += 1
+    return entry[0]
+
+async def release_shared_client(client: httpx.AsyncClient) -> bool:
+    """Drop one reference to a shared client, closing it with the last user"""
+    clients = _shared_clients.get(asyncio.get_running_loop(), {})
+    for key, entry in clients.items():
+        if entry[0] is client:
+            entry[1] -= 1
+            if entry[1] <= 0:
+                del clients[key]
+                await client.aclose()
+            return True
+    return False  # not a shared client
 
 class ResilientGooseAgent:
     """Resilient wrapper around GooseAgent with automatic recovery"""
@@ -28,7 +96,8 @@ class ResilientGooseAgent:
         self.connection_state = "disconnected"
         self.last_heartbeat = None
         self.heartbeat_task = None
-        self.http_client = httpx.AsyncClient(timeout=self.config.timeout)
+        self._cooldown_until = 0.0  # time.monotonic() before which reconnect() gives up at once
+        self.http_client = acquire_shared_client(self.config)
         
     async def connect(self, goose_api_endpoint: str = "http://localhost:3000/api"):
         """Connect to Goose API"""
@@ -86,6 +155,11 @@ class ResilientGooseAgent:
     
     async def reconnect(self):
         """Reconnect to GooseAgent"""
+        if time.monotonic() < self._cooldown_until:
+            # Recently exhausted all retries; don't add to a reconnect storm
+            self.connection_state = "disconnected"
+            return False
+        
         logger.info("Attempting to reconnect to GooseAgent")
         self.connection_state = "reconnecting"
         
@@ -96,10 +170,12 @@ class ResilientGooseAgent:
                     return True
             except Exception as e:
                 logger.warning(f"Reconnection attempt {attempt + 1} failed: {e}")
-                if attempt < self.config.max_retries - 1:
-                    await asyncio.sleep(2 ** attempt)  # Exponential backoff
+            if attempt < self.config.max_retries - 1:
+                # Full-jitter exponential backoff so clients don't retry in lockstep
+                await asyncio.sleep(random.uniform(0, min(self.config.max_backoff, 2 ** attempt)))
         
         self.connection_state = "disconnected"
+        self._cooldown_until = time.monotonic() + self.config.reconnect_cooldown
         logger.error("Failed to reconnect to GooseAgent after all attempts")
         return False
     
@@ -143,8 +219,10 @@ class ResilientGooseAgent:
         if self.heartbeat_task:
             self.heartbeat_task.cancel()
             
-        if self.http_client:
+        if self.http_client is not None and not await release_shared_client(self.http_client):
+            # Built outside a loop or swapped in by the caller: owned by this agent alone
             await self.http_client.aclose()
+        self.http_client = None
             
         self.connection_state = "disconnected"
         logger.info("Closed GooseAgent connection")
\ No newline at end of file
@@ -3,21 +3,27 @@ Incremental Knowledge Base
 Implements incremental updates to prevent full reloads
 """
 import asyncio
+import itertools
 import logging
-import json
-from typing import Dict, Any, Optional, List
+import orjson
+from typing import Deque, Dict, Any, Optional, List, Set, Tuple
+from collections import defaultdict, deque
 from dataclasses import dataclass
 from datetime import datetime
 import os
+import time
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# Same key handling as json.dump (non-str keys become strings), plus dataclasses
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_DATACLASS
+
 @dataclass
 class KnowledgeConfig:
     """Configuration for incremental knowledge base"""
     storage_path: str = "data/knowledge"
-    checkpoint_frequency: int = 10  # updates
+    checkpoint_frequency: int = 1000  # logged deltas between snapshot compactions
     max_cache_size: int = 1000
     enable_persistence: bool = True
 
@@ -26,9 +32,15 @@ class IncrementalKnowledgeBase:
     
     def __init__(self, config: Optional[KnowledgeConfig] = None):
         self.config = config or KnowledgeConfig()
+        # Inverted index over dict-valued entries: field -> value -> keys,
+        # plus the keys of every entry that has each field at all
+        self._index: Dict[str, Dict[Any, Set[str]]] = defaultdict(lambda: defaultdict(set))
+        self._field_keys: Dict[str, Set[str]] = defaultdict(set)
         self.knowledge = {}
-        self.delta_log: List[Dict[str, Any]] = []
+        # Recent deltas only; full history lives in the NDJSON log
+        self.delta_log: Deque[Dict[str, Any]] = deque(maxlen=self.config.max_cache_size)
         self.update_count = 0
+        self._delta_handle = None  # append handle on the NDJSON delta log
         self.lock = asyncio.Lock()
         self.logger = logging.getLogger(__name__)
         
@@ -38,20 +50,125 @@ class IncrementalKnowledgeBase:
         # Load existing knowledge if available
         self._load_persistent_knowledge()
     
+    @property
+    def knowledge(self) -> Dict[str, Any]:
+        return self._knowledge
+    
+    @knowledge.setter
+    def knowledge(self, value: Dict[str, Any]) -> None:
+        """Replace the whole knowledge dict and rebuild the query index"""
+        self._knowledge = value
+        self._index.clear()
+        self._field_keys.clear()
+        for key, entry in value.items():
+            self._index_entry(key, entry)
+    
+    def _index_entry(self, key: str, entry: Any) -> None:
+        """Add an entry's fields to the query index"""
+        if not isinstance(entry, dict):
+            return
+        for field, field_value in entry.items():
+            self._field_keys[field].add(key)
+            try:
+                self._index[field][field_value].add(key)
+            except TypeError:
+                # Unhashable values are only reachable through the scan path
+                pass
+    
+    def _unindex_entry(self, key: str) -> None:
+        """Drop the currently stored entry for key from the query index"""
+        entry = self._knowledge.get(key)
+        if not isinstance(entry, dict):
+            return
+        for field, field_value in entry.items():
+            self._field_keys[field].discard(key)
+            try:
+                postings = self._index[field].get(field_value)
+            except TypeError:
+                continue
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._index[field][field_value]
+    
+    def _set_entry(self, key: str, value: Any) -> None:
+        """Store an entry, keeping the query index in sync"""
+        self._unindex_entry(key)
+        self._knowledge[key] = value
+        self._index_entry(key, value)
+    
+    @property
+    def _snapshot_file(self) -> Path:
+        return Path(self.config.storage_path) / "knowledge.json"
+    
+    @property
+    def _delta_file(self) -> Path:
+        return Path(self.config.storage_path) / "delta_log.ndjson"
+    
     def _load_persistent_knowledge(self):
-        """Load knowledge from persistent storage"""
+        """Load the last snapshot, then replay deltas logged since it was taken"""
         if not self.config.enable_persistence:
             return
-            
-        knowledge_file = Path(self.config.storage_path) / "knowledge.json"
+        
+        self._load_snapshot()
+        self.delta_log.clear()
+        if not self._delta_file.exists():
+            return
+        
+        entries, damaged = self._read_delta_log()
+        for entry in entries:
+            try:
+                self.apply_delta(entry["delta"])
+            except Exception as e:
+                self.logger.error(f"Failed to replay delta {entry.get('update_id')}: {e}")
+            self.delta_log.append(entry)
+            self.update_count = max(self.update_count, entry.get("update_id", -1) + 1)
+        if entries:
+            self.logger.info(f"Replayed {len(entries)} logged deltas")
+        
+        if damaged:
+            # Fold what replayed into a snapshot so later appends start on a clean log
+            self.logger.warning("Delta log had unreadable lines, compacting it into a snapshot")
+            self._write_snapshot()
+    
+    def _load_snapshot(self) -> None:
+        """Replace the knowledge with the last snapshot, or nothing if there is none"""
+        self.knowledge = {}
+        knowledge_file = self._snapshot_file
         if knowledge_file.exists():
             try:
-                with open(knowledge_file, 'r') as f:
-                    self.knowledge = json.load(f)
+                with open(knowledge_file, 'rb') as f:
+                    self.knowledge = orjson.loads(f.read())
                 self.logger.info(f"Loaded knowledge base with {len(self.knowledge)} entries")
-            except Exception as e:
+            except (OSError, orjson.JSONDecodeError) as e:
                 self.logger.warning(f"Failed to load knowledge base: {e}")
     
+    def _read_delta_log(self) -> Tuple[List[Dict[str, Any]], bool]:
+        """Parse the NDJSON delta log; also reports whether any line was unreadable"""
+        entries = []
+        damaged = False
+        with open(self._delta_file, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                if not line.endswith(b"\n"):
+                    damaged = True  # torn final append; the next one would be glued onto it
+                try:
+                    entry = orjson.loads(line)
+                    entry["delta"]
+                except (orjson.JSONDecodeError, KeyError, TypeError):
+                    damaged = True
+                    continue
+                entries.append(entry)
+        return entries, damaged
+    
+    def _append_delta(self, entry: Dict[str, Any]) -> None:
+        """Append one delta entry to the NDJSON log"""
+        if self._delta_handle is None:
+            self._delta_handle = open(self._delta_file, 'ab')
+        self._delta_handle.write(orjson.dumps(entry, default=str, option=ORJSON_OPTIONS) + b"\n")
+        self._delta_handle.flush()
+    
     async def update_incremental(self, delta: Dict[str, Any]) -> None:
         """Update knowledge base incrementally without full reload"""
         async with self.lock:
@@ -59,55 +176,73 @@ class IncrementalKnowledgeBase:
             self.apply_delta(delta)
             
             # Log the delta
-            self.delta_log.append({
-                "timestamp": datetime.now().isoformat(),
-                "delta": delta,
-                "update_id": self.update_count
-            })
-            
-            self.update_count += 1
-            
-            # Persist checkpoint if needed
-            if (self.config.enable_persistence and 
-                self.update_count % self.config.checkpoint_frequency == 0):
-                await self.persist_checkpoint()
+            self._log_delta(delta)
             
             self.logger.debug(f"Applied incremental update {self.update_count}")
     
+    def _log_delta(self, delta: Dict[str, Any]) -> None:
+        """Record an applied delta; persistence appends it, compacting periodically"""
+        entry = {
+            "ts_ns": time.time_ns(),  # formatted only when reported
+            "delta": delta,
+            "update_id": self.update_count
+        }
+        self.delta_log.append(entry)
+        self.update_count += 1
+        
+        if self.config.enable_persistence:
+            try:
+                self._append_delta(entry)
+            except Exception as e:
+                self.logger.error(f"Failed to append knowledge delta: {e}")
+            
+            # Fold the log into a fresh snapshot if needed
+            if self.update_count % self.config.checkpoint_frequency == 0:
+                self._write_snapshot()
+    
     def apply_delta(self, delta: Dict[str, Any]) -> None:
         """Apply a delta update to the knowledge base"""
         for key, value in delta.items():
             if key.startswith("+"):  # Add operation
                 actual_key = key[1:]
-                self.knowledge[actual_key] = value
+                self._set_entry(actual_key, value)
             elif key.startswith("-"):  # Remove operation
                 actual_key = key[1:]
+                self._unindex_entry(actual_key)
                 self.knowledge.pop(actual_key, None)
             elif key.startswith("~"):  # Update operation
                 actual_key = key[1:]
                 if actual_key in self.knowledge:
                     # Merge update
                     if isinstance(self.knowledge[actual_key], dict) and isinstance(value, dict):
+                        self._unindex_entry(actual_key)
                         self.knowledge[actual_key].update(value)
+                        self._index_entry(actual_key, self.knowledge[actual_key])
                     else:
-                        self.knowledge[actual_key] = value
+                        self._set_entry(actual_key, value)
             else:  # Direct assignment
-                self.knowledge[key] = value
+                self._set_entry(key, value)
     
     async def persist_checkpoint(self) -> None:
         """Persist current knowledge to checkpoint"""
         if not self.config.enable_persistence:
             return
-            
+        self._write_snapshot()
+    
+    def _write_snapshot(self) -> None:
+        """Atomically write a full snapshot, then truncate the delta log it covers"""
         try:
-            knowledge_file = Path(self.config.storage_path) / "knowledge.json"
-            with open(knowledge_file, 'w') as f:
-                json.dump(self.knowledge, f, indent=2, default=str)
+            knowledge_file = self._snapshot_file
+            tmp_file = knowledge_file.with_suffix(".json.tmp")
+            with open(tmp_file, 'wb') as f:
+                f.write(orjson.dumps(self.knowledge, default=str, option=ORJSON_OPTIONS))
+            os.replace(tmp_file, knowledge_file)
             
-            # Also save delta log
-            delta_file = Path(self.config.storage_path) / "delta_log.json"
-            with open(delta_file, 'w') as f:
-                json.dump(self.delta_log, f, indent=2, default=str)
+            if self._delta_handle is not None:
+                self._delta_handle.seek(0)
+                self._delta_handle.truncate()
+            elif self._delta_file.exists():
+                open(self._delta_file, 'w').close()
                 
             self.logger.info(f"Persisted knowledge checkpoint with {len(self.knowledge)} entries")
         except Exception as e:
@@ -121,6 +256,36 @@ class IncrementalKnowledgeBase:
     
     def query_knowledge(self, query: Dict[str, Any]) -> Dict[str, Any]:
         """Query knowledge base with filters"""
+        candidates = None
+        for qk, qv in query.items():
+            try:
+                matching = self._matching_keys(qk, qv)
+            except TypeError:
+                # Unhashable filter value, no posting list to look up
+                return self._scan_knowledge(query)
+            candidates = matching if candidates is None else candidates & matching
+            if not candidates:
+                return {}
+        
+        if candidates is None:
+            return dict(self.knowledge)
+        return {k: self.knowledge[k] for k in candidates}
+    
+    def _matching_keys(self, qk: str, qv: Any) -> Set[str]:
+        """Keys passing a single filter: equal field value, or no such field to compare"""
+        matching = set(self._index.get(qk, {}).get(qv, ()))
+        with_field = self._field_keys.get(qk, set())
+        if qk == "key":
+            # Entries without a 'key' field are matched on their own key
+            if qv in self.knowledge and qv not in with_field:
+                matching.add(qv)
+        elif len(with_field) < len(self.knowledge):
+            # Entries lacking the field are not filtered out by it
+            matching.update(k for k in self.knowledge if k not in with_field)
+        return matching
+    
+    def _scan_knowledge(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        """Full-scan query, for filters the index cannot answer"""
         results = {}
         
         for k, v in self.knowledge.items():
@@ -142,17 +307,17 @@ class IncrementalKnowledgeBase:
     async def merge_knowledge(self, other_knowledge: Dict[str, Any]) -> None:
         """Merge knowledge from another source"""
         async with self.lock:
-            self.knowledge.update(other_knowledge)
-            self.update_count += 1
-            
-            if self.config.enable_persistence:
-                await self.persist_checkpoint()
+            # Logged as explicit adds so keys that look like delta ops stay literal
+            delta = {f"+{key}": value for key, value in other_knowledge.items()}
+            self.apply_delta(delta)
+            self._log_delta(delta)
     
     def get_delta_log(self, limit: int = None) -> List[Dict[str, Any]]:
         """Get recent delta log entries"""
         if limit:
-            return self.delta_log[-limit:]
-        return self.delta_log.copy()
+            # Walk back from the right end instead of copying the whole log
+            return list(itertools.islice(reversed(self.delta_log), limit))[::-1]
+        return list(self.delta_log)
     
     async def rollback_to_checkpoint(self, checkpoint_id: int = None) -> bool:
         """Rollback to a specific checkpoint"""
@@ -166,26 +331,35 @@ class IncrementalKnowledgeBase:
                 self.logger.info("Rolled back to last persisted checkpoint")
                 return True
             
-            # Find checkpoint in delta log
-            for i, delta_entry in enumerate(reversed(self.delta_log)):
-                if delta_entry.get("update_id") == checkpoint_id:
-                    # Rebuild knowledge up to this point
-                    self.knowledge = {}
-                    self._load_persistent_knowledge()
-                    
-                    # Apply all deltas up to checkpoint
-                    for entry in self.delta_log[:len(self.delta_log)-i]:
-                        self.apply_delta(entry["delta"])
-                    
-                    self.logger.info(f"Rolled back to checkpoint {checkpoint_id}")
-                    return True
+            # Only deltas still in the log (i.e. since the last snapshot) can be rolled back to
+            entries = self._read_delta_log()[0] if self._delta_file.exists() else []
+            if not any(entry.get("update_id") == checkpoint_id for entry in entries):
+                self.logger.warning(f"Checkpoint {checkpoint_id} not found")
+                return False
             
-            self.logger.warning(f"Checkpoint {checkpoint_id} not found")
-            return False
+            # Rebuild from the snapshot plus the deltas up to the checkpoint
+            self._load_snapshot()
+            for entry in entries:
+                if entry.get("update_id", -1) > checkpoint_id:
+                    break
+                self.apply_delta(entry["delta"])
+            while self.delta_log and self.delta_log[-1].get("update_id", -1) > checkpoint_id:
+                self.delta_log.pop()
+            
+            # Persist, so the discarded deltas are not replayed on the next load
+            self._write_snapshot()
+            self.logger.info(f"Rolled back to checkpoint {checkpoint_id}")
+            return True
         except Exception as e:
             self.logger.error(f"Failed to rollback to checkpoint: {e}")
             return False
     
+    def close(self) -> None:
+        """Close the delta log handle"""
+        if self._delta_handle is not None:
+            self._delta_handle.close()
+            self._delta_handle = None
+    
     def get_statistics(self) -> Dict[str, Any]:
         """Get knowledge base statistics"""
         return {
@@ -193,5 +367,8 @@ class IncrementalKnowledgeBase:
             "total_updates": self.update_count,
             "delta_log_size": len(self.delta_log),
             "storage_path": self.config.storage_path,
-            "last_update": self.delta_log[-1]["timestamp"] if self.delta_log else None
+            "last_update": (
+                datetime.fromtimestamp(self.delta_log[-1]["ts_ns"] / 1e9).isoformat()
+                if self.delta_log else None
+            )
         }
\ No newline at end of file
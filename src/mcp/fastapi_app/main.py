@@ -4,22 +4,45 @@ FastAPI MCP Server for CRE Intelligence
 Implements all six intelligence techniques as MCP-accessible tools
 """
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Request
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional, Any, Set
+from typing import List, Dict, Optional, Any, Set, Union
 from pathlib import Path
 from datetime import datetime, date, timedelta
 import json
+from contextlib import asynccontextmanager
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import CountVectorizer, TfidfVectorizer
 from sklearn.metrics.pairwise import cosine_similarity
-import hashlib
+import orjson
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.json as paj
+import yaml
+
+# Optional request profiler (see profile_request)
+try:
+    from pyinstrument import Profiler
+except ImportError:
+    Profiler = None
+
+# Prefer the libyaml C bindings when PyYAML was built with them
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as YamlDumper
+except ImportError:
+    from yaml import SafeLoader as YamlLoader, SafeDumper as YamlDumper
+import copy
+import functools
+import itertools
 import re
+import time
 from collections import Counter, defaultdict
 import asyncio
 import logging
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
 from enum import Enum
 
 # Setup logging
@@ -35,15 +58,228 @@ LEX = DATA / "lexicon"
 CFG = BASE / "config"
 CACHE = DATA / "cache"
 
+NS_PER_DAY = 86_400 * 1_000_000_000
+
 # Ensure directories exist
 for dir_path in [RAW, PROC, LEX, CFG, CACHE]:
     dir_path.mkdir(parents=True, exist_ok=True)
 
+class CREJSONResponse(ORJSONResponse):
+    """orjson response that handles numpy values and stringifies anything else unknown"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS,
+            default=str
+        )
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build the technique instances once per worker, at startup rather than import"""
+    # One process pool per worker for the per-file parsing/scanning fan-outs
+    pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+    app.state.techniques = Techniques(pool)
+    # Built here rather than at import: on Python 3.9 a Lock binds to the loop current at construction
+    app.state.profile_lock = asyncio.Lock()
+    try:
+        yield
+    finally:
+        # shutdown() waits on the workers, so keep it off the event loop
+        await asyncio.to_thread(pool.shutdown)
+
 app = FastAPI(
+    lifespan=lifespan,
     title="CRE Intelligence MCP Server",
     version="1.0.0",
-    description="Complete implementation of six CRE intelligence techniques"
+    description="Complete implementation of six CRE intelligence techniques",
+    default_response_class=CREJSONResponse
+)
+
+# Per-request profiling: set CRE_PROFILING=1 on the server, then send X-Profile
+PROFILING_ENABLED = Profiler is not None and os.environ.get("CRE_PROFILING") == "1"
+
+async def profile_request(request: Request, call_next):
+    """Return a pyinstrument HTML report instead of the response when X-Profile is sent"""
+    if not request.headers.get("X-Profile"):
+        return await call_next(request)
+    profile_lock = request.app.state.profile_lock
+    if profile_lock.locked():
+        # Only one async-mode profiler can sample the event loop at a time
+        return await call_next(request)
+    
+    async with profile_lock:
+        profiler = Profiler(async_mode="enabled", interval=0.001)
+        profiler.start()
+        try:
+            await call_next(request)
+        finally:
+            profiler.stop()
+    return HTMLResponse(profiler.output_html())
+
+# Registered only when enabled, so normal requests skip the middleware wrapping
+if PROFILING_ENABLED:
+    app.middleware("http")(profile_request)
+
+# ============================================================================
+# Ingest Helpers
+# ============================================================================
+
+# Human-readable JSON artifacts (results/config snapshots)
+ORJSON_PRETTY = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+WEEKDAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+TOPIC_STOPWORDS = frozenset({'would', 'could', 'should'})
+
+# Market signal -> title terms that indicate it, in reporting order
+MARKET_SIGNAL_TERMS = (
+    ('leasing_activity', ('lease',)),
+    ('transaction_activity', ('sale', 'acquisition')),
+    ('development_pipeline', ('development', 'construction'))
 )
+MARKET_SIGNAL_BY_TERM = {term: signal for signal, terms in MARKET_SIGNAL_TERMS for term in terms}
+MARKET_SIGNAL_RE = re.compile('|'.join(map(re.escape, MARKET_SIGNAL_BY_TERM)), re.IGNORECASE)
+
+# Smaller files cannot hold a single post record
+MIN_JSONL_RECORD_BYTES = 32
+
+# Column projection for vertical scans; other JSONL fields are never materialized
+VERTICAL_SCAN_SCHEMA = pa.schema([('title', pa.string()), ('selftext', pa.string())])
+
+# Fields carried through the dual-sort strategy collections
+COLLECTION_FIELDS = ('id', 'title', 'selftext', 'subreddit', 'created_utc', 'score', 'num_comments', 'url')
+
+def _read_jsonl_file(file_path: Path) -> pd.DataFrame:
+    """Read a single JSONL file (top-level so it can run in a worker process)"""
+    return pd.read_json(file_path, lines=True)
+
+def post_id_key(post_id: Any) -> int:
+    """Compact integer key for a post id: base36 Reddit ids decode exactly, others hash"""
+    try:
+        return int(post_id, 36)
+    except (TypeError, ValueError):
+        # Non-base36 ids may collide; acceptable for a seen-posts counter
+        return hash(post_id)
+
+def top_title_tokens(titles: List[str], k: int, stop_words: Optional[Set[str]] = None) -> List[str]:
+    """Most frequent 5+ character title tokens, counted as a sparse matrix"""
+    if not titles or k <= 0:
+        return []
+    
+    vectorizer = CountVectorizer(
+        lowercase=True,
+        token_pattern=r'(?u)\b\w{5,}\b',
+        stop_words=sorted(stop_words) if stop_words else None
+    )
+    try:
+        counts = vectorizer.fit_transform(titles)
+    except ValueError:
+        # No token survived the pattern / stop words
+        return []
+    
+    totals = np.asarray(counts.sum(axis=0)).ravel()
+    k = min(k, totals.size)
+    top = np.argpartition(-totals, k - 1)[:k]
+    top = top[np.argsort(-totals[top], kind='stable')]
+    
+    feature_names = vectorizer.get_feature_names_out()
+    return [feature_names[i] for i in top]
+
+def _map_files_inline(func, file_paths: List[Path], return_exceptions: bool) -> List[Any]:
+    results = []
+    for file_path in file_paths:
+        try:
+            results.append(func(file_path))
+        except Exception as e:
+            if not return_exceptions:
+                raise
+            results.append(e)
+    return results
+
+async def map_files_in_processes(
+    func,
+    file_paths: List[Path],
+    pool: Optional[Executor] = None,
+    return_exceptions: bool = False
+) -> List[Any]:
+    """Run a picklable per-file function across the shared worker pool, preserving order"""
+    if pool is None or len(file_paths) <= 1:
+        # No pool, or not worth the pickling round-trip for a single file; a worker
+        # thread still keeps the parsing off the event loop
+        return await asyncio.to_thread(_map_files_inline, func, file_paths, return_exceptions)
+    
+    loop = asyncio.get_running_loop()
+    return await asyncio.gather(
+        *(loop.run_in_executor(pool, func, path) for path in file_paths),
+        return_exceptions=return_exceptions
+    )
+
+def vertical_scan_pattern(terms) -> str:
+    """Alternation of literal terms, usable by Arrow's (RE2) regex kernels"""
+    return '|'.join(map(re.escape, terms))
+
+def _scan_vertical_file(file_path: Path, pattern: str, max_titles: int = 100) -> tuple:
+    """Count posts whose selftext matches the term pattern; return (count, leading titles)"""
+    table = paj.read_json(
+        file_path,
+        read_options=paj.ReadOptions(block_size=64 << 20),
+        parse_options=paj.ParseOptions(
+            explicit_schema=VERTICAL_SCAN_SCHEMA,
+            unexpected_field_behavior='ignore'
+        )
+    )
+    
+    # Filter for vertical relevance inside Arrow's string kernels
+    mask = pc.match_substring_regex(table['selftext'], pattern, ignore_case=True)
+    matched = table.filter(mask)
+    
+    titles = [title or '' for title in matched['title'].slice(0, max_titles).to_pylist()]
+    return matched.num_rows, titles
+
+def _top_k_indices(keys: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest keys, highest first, via partial selection"""
+    k = min(k, keys.size)
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    top = np.argpartition(-keys, k - 1)[:k]
+    return top[np.argsort(-keys[top], kind='stable')]
+
+def _collect_file_top_records(file_path: Path, strategy: str, now_ts: float, limit: int = 100) -> List[Dict]:
+    """Rank one raw file by a sort strategy and keep its top `limit` records"""
+    records = list(iter_jsonl(file_path, COLLECTION_FIELDS))
+    n = len(records)
+    score = np.fromiter((r.get('score') or 0 for r in records), dtype=np.float64, count=n)
+    created_utc = np.fromiter((r.get('created_utc') or 0 for r in records), dtype=np.float64, count=n)
+    
+    if strategy == SortStrategy.NEW.value:
+        keys = created_utc
+    elif strategy == SortStrategy.HOT.value:
+        # Hot = recent + high engagement
+        keys = score / (1.0 + (now_ts - created_utc) / 86400.0)
+    else:
+        # RELEVANCE and TOP both rank by score
+        keys = score
+    
+    # O(n) partial selection instead of a full sort
+    return [records[i] for i in _top_k_indices(keys, limit)]
+
+@functools.lru_cache(maxsize=4)
+def _load_yaml_cached(path_str: str, mtime_ns: int) -> Dict:
+    """Parse a YAML file once per modification time"""
+    return yaml.load(Path(path_str).read_text(), Loader=YamlLoader)
+
+def iter_jsonl(file_path: Path, fields: Optional[tuple] = None):
+    """Stream records from a JSONL file one line at a time, keeping only `fields`"""
+    with open(file_path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            if fields is None:
+                yield record
+            else:
+                yield {field: record[field] for field in fields if field in record}
 
 # ============================================================================
 # Data Models
@@ -93,6 +329,7 @@ class ClientSideFilterRequest(BaseModel):
     )
     semantic_similarity_threshold: float = Field(default=0.4)
     city: Optional[str] = None
+    output_format: str = Field(default="jsonl", description="Filtered output format: jsonl or parquet")
 
 class LocalSubTargetingRequest(BaseModel):
     """Technique 4: Local-Sub Geographic Targeting"""
@@ -121,6 +358,24 @@ class DualSortStrategyRequest(BaseModel):
     deduplication: bool = Field(default=True)
     backfill_months: int = Field(default=12)
 
+class BatchCall(BaseModel):
+    """One tool invocation inside a /batch request"""
+    id: Union[int, str]
+    tool: str
+    args: Dict[str, Any] = {}
+    input_from: Dict[str, str] = Field(
+        default={},
+        description="Argument name -> reference to an earlier call's result, e.g. $1.top_terms[:10].term"
+    )
+    after: List[Union[int, str]] = Field(
+        default=[],
+        description="Ids of calls that must finish first, successfully or not (e.g. for files they write)"
+    )
+
+class BatchRequest(BaseModel):
+    """Several tool calls resolved and executed in one round trip"""
+    calls: List[BatchCall]
+
 # ============================================================================
 # Technique 1: Iterative JSON Refinement / Payload Optimization
 # ============================================================================
@@ -128,18 +383,32 @@ class DualSortStrategyRequest(BaseModel):
 class PayloadOptimizer:
     """Implements iterative refinement of Apify Actor JSON payloads"""
     
+    # Request-independent Apify Actor defaults
+    PAYLOAD_TEMPLATE = {
+        'maxItems': 1000,
+        'maxPostAge': 365,
+        'sort': 'relevance',
+        'skipComments': False
+    }
+    
+    # Term substitutions used to widen query coverage
+    COVERAGE_VARIANTS = (
+        (re.compile('lease', re.IGNORECASE), 'rental'),
+        (re.compile('commercial', re.IGNORECASE), 'CRE')
+    )
+    
     def __init__(self):
         self.optimization_history = []
         
     async def optimize_payload(self, request: PayloadOptimizationRequest) -> Dict:
         """Iteratively refine JSON payload for optimal Reddit API calls"""
         
-        initial_payload = self._create_initial_payload(request)
-        optimized = initial_payload.copy()
+        optimized = self._create_initial_payload(request)
         
         for round_num in range(request.optimization_rounds):
             # Measure current payload efficiency
             metrics = self._measure_payload_metrics(optimized)
+            queries_before = list(optimized.get('searchQueries', []))
             
             # Apply optimization strategies
             if metrics['url_length'] > request.max_url_length:
@@ -157,6 +426,10 @@ class PayloadOptimizer:
                 'metrics': metrics,
                 'payload_size': len(json.dumps(optimized))
             })
+            
+            # Converged: further rounds would see the same metrics
+            if optimized.get('searchQueries', []) == queries_before:
+                break
         
         # Generate per-subreddit startUrls
         optimized['startUrls'] = self._generate_start_urls(optimized, request.subreddits)
@@ -171,14 +444,11 @@ class PayloadOptimizer:
     def _create_initial_payload(self, request: PayloadOptimizationRequest) -> Dict:
         """Create initial Apify Actor payload"""
         return {
-            'searchQueries': request.keywords,
+            'searchQueries': list(request.keywords),
             'subreddits': request.subreddits,
             'dateFrom': request.date_start,
             'dateTo': request.date_end,
-            'maxItems': 1000,
-            'maxPostAge': 365,
-            'sort': 'relevance',
-            'skipComments': False
+            **self.PAYLOAD_TEMPLATE
         }
     
     def _compress_boolean_clauses(self, payload: Dict) -> Dict:
@@ -195,7 +465,7 @@ class PayloadOptimizer:
     def _remove_redundant_terms(self, payload: Dict) -> Dict:
         """Remove redundant search terms"""
         if 'searchQueries' in payload:
-            unique_terms = list(set(payload['searchQueries']))
+            unique_terms = list(dict.fromkeys(payload['searchQueries']))
             payload['searchQueries'] = unique_terms
         return payload
     
@@ -204,11 +474,11 @@ class PayloadOptimizer:
         # Add variations of key terms
         expanded_queries = payload.get('searchQueries', []).copy()
         for query in payload.get('searchQueries', []):
-            if 'lease' in query.lower():
-                expanded_queries.append(query.replace('lease', 'rental'))
-            if 'commercial' in query.lower():
-                expanded_queries.append(query.replace('commercial', 'CRE'))
-        payload['searchQueries'] = list(set(expanded_queries))[:10]  # Limit to top 10
+            for pattern, replacement in self.COVERAGE_VARIANTS:
+                if pattern.search(query):
+                    expanded_queries.append(pattern.sub(replacement, query))
+        # Order-preserving dedup keeps the original queries ahead of variants
+        payload['searchQueries'] = list(dict.fromkeys(expanded_queries))[:10]  # Limit to top 10
         return payload
     
     def _generate_start_urls(self, payload: Dict, subreddits: List[str]) -> List[str]:
@@ -247,15 +517,12 @@ class PayloadOptimizer:
     
     def _identify_coverage_gaps(self, payload: Dict) -> List[str]:
         """Identify potential coverage gaps"""
-        gaps = []
         essential_terms = ['lease', 'rent', 'tenant', 'landlord', 'property', 'commercial']
-        queries_lower = [q.lower() for q in payload.get('searchQueries', [])]
+        # One scan per term over all queries; the newline separator keeps
+        # matches from spanning two queries
+        queries_text = '\n'.join(payload.get('searchQueries', [])).lower()
         
-        for term in essential_terms:
-            if not any(term in q for q in queries_lower):
-                gaps.append(term)
-        
-        return gaps
+        return [term for term in essential_terms if term not in queries_text]
     
     def _save_payload(self, payload: Dict) -> str:
         """Save optimized payload to disk"""
@@ -294,8 +561,10 @@ class PhraseMiner:
         if not corpus:
             return {'ok': False, 'message': 'No corpus data available', 'terms': []}
         
-        # Extract TF-IDF features
-        tfidf_results = self._extract_tfidf_features(corpus, request.ngram_range, request.top_k)
+        # Extract TF-IDF features (CPU-bound; keep the event loop free for concurrent stages)
+        tfidf_results = await asyncio.to_thread(
+            self._extract_tfidf_features, corpus, request.ngram_range, request.top_k
+        )
         
         # Classify terms by domain
         classified_terms = self._classify_terms(
@@ -332,16 +601,20 @@ class PhraseMiner:
         
         if source == "last_month":
             cutoff = datetime.utcnow() - timedelta(days=30)
-            pattern = "filtered_*.jsonl"
+            pattern = "filtered_*"
         else:
-            pattern = "*.jsonl"
+            pattern = "*"
             cutoff = datetime.utcnow() - timedelta(days=90)
         
-        for file_path in PROC.glob(pattern):
+        file_paths = list(PROC.glob(f"{pattern}.jsonl")) + list(PROC.glob(f"{pattern}.parquet"))
+        for file_path in file_paths:
             try:
-                df = pd.read_json(file_path, lines=True)
+                if file_path.suffix == '.parquet':
+                    df = pd.read_parquet(file_path, columns=['title', 'selftext'])
+                else:
+                    df = pd.read_json(file_path, lines=True)
                 # Combine title and selftext
-                texts = (df['title'].fillna('') + ' ' + df['selftext'].fillna('')).tolist()
+                texts = df['title'].fillna('').str.cat(df['selftext'].fillna(''), sep=' ').tolist()
                 corpus.extend(texts)
             except Exception as e:
                 logger.warning(f"Error loading {file_path}: {e}")
@@ -350,27 +623,30 @@ class PhraseMiner:
     
     def _extract_tfidf_features(self, corpus: List[str], ngram_range: tuple, top_k: int) -> Dict:
         """Extract TF-IDF features from corpus"""
-        self.vectorizer = TfidfVectorizer(
+        vectorizer = TfidfVectorizer(
             ngram_range=ngram_range,
             max_features=5000,
             min_df=2,
             max_df=0.8,
             stop_words='english',
-            token_pattern=r'\b[a-zA-Z][a-zA-Z]+\b'
+            token_pattern=r'\b[a-zA-Z][a-zA-Z]+\b',
+            # Scores are only ranked, so single precision halves the matrix
+            dtype=np.float32
         )
         
-        tfidf_matrix = self.vectorizer.fit_transform(corpus)
-        feature_names = self.vectorizer.get_feature_names_out()
+        tfidf_matrix = vectorizer.fit_transform(corpus)
+        feature_names = vectorizer.get_feature_names_out()
+        self.vectorizer = vectorizer
         
         # Get top terms by average TF-IDF score
         avg_scores = tfidf_matrix.mean(axis=0).A1
-        top_indices = avg_scores.argsort()[-top_k:][::-1]
+        top_indices = _top_k_indices(avg_scores, top_k)
         
-        top_terms = [(feature_names[i], avg_scores[i]) for i in top_indices]
+        top_terms = [(feature_names[i], float(avg_scores[i])) for i in top_indices]
         
         return {
             'terms': top_terms,
-            'feature_names': feature_names.tolist(),
+            'feature_names': feature_names,  # vectorizer's array as-is; no per-call list copy
             'matrix_shape': tfidf_matrix.shape
         }
     
@@ -402,13 +678,14 @@ class PhraseMiner:
         """Calculate comprehensive term importance scores"""
         term_scores = []
         
+        # First category listing each term, as a dict instead of a scan per term
+        term_categories = {}
+        for cat, terms_list in classified_terms.items():
+            for t in terms_list:
+                term_categories.setdefault(t[0], cat)
+        
         for term, tfidf_score in tfidf_results['terms']:
-            # Find category
-            category = 'uncategorized'
-            for cat, terms_list in classified_terms.items():
-                if any(t[0] == term for t in terms_list):
-                    category = cat
-                    break
+            category = term_categories.get(term, 'uncategorized')
             
             # Calculate composite score
             category_weight = 1.5 if category in ['financial', 'legal'] else 1.0
@@ -481,8 +758,9 @@ class PhraseMiner:
 class ClientSideFilterEngine:
     """6-stage client-side filtering pipeline"""
     
-    def __init__(self):
+    def __init__(self, pool: Optional[Executor] = None):
         self.filter_stats = defaultdict(int)
+        self.pool = pool  # shared process pool for loading; see map_files_in_processes
         
     async def filter_posts(self, request: ClientSideFilterRequest) -> Dict:
         """Apply comprehensive 6-stage filtering pipeline"""
@@ -538,19 +816,25 @@ class ClientSideFilterEngine:
     
     async def _load_posts(self, date_start: str, date_end: str) -> pd.DataFrame:
         """Load posts from raw data"""
+        file_paths = sorted(RAW.glob("*.jsonl"))
         frames = []
         
-        for file_path in RAW.glob("*.jsonl"):
-            try:
-                df = pd.read_json(file_path, lines=True)
-                frames.append(df)
-            except Exception as e:
-                logger.warning(f"Error loading {file_path}: {e}")
+        # JSON decoding is CPU-bound, so fan files out across processes
+        loaded = await map_files_in_processes(_read_jsonl_file, file_paths, self.pool, return_exceptions=True)
+        
+        for file_path, result in zip(file_paths, loaded):
+            if isinstance(result, Exception):
+                logger.warning(f"Error loading {file_path}: {result}")
+            else:
+                frames.append(result)
         
         if not frames:
             return pd.DataFrame()
+        if len(frames) == 1:
+            return frames[0]
         
-        return pd.concat(frames, ignore_index=True)
+        # One concatenation over all per-file frames, without an extra defensive copy
+        return pd.concat(frames, ignore_index=True, copy=False)
     
     def _temporal_filter(self, posts: pd.DataFrame, date_start: str, date_end: str) -> pd.DataFrame:
         """Filter posts by date range"""
@@ -570,7 +854,7 @@ class ClientSideFilterEngine:
             return posts
         
         # Combine text fields
-        posts['combined_text'] = posts['title'].fillna('') + ' ' + posts['selftext'].fillna('')
+        posts['combined_text'] = posts['title'].fillna('').str.cat(posts['selftext'].fillna(''), sep=' ')
         
         # Include keywords (OR logic)
         if keywords:
@@ -667,15 +951,17 @@ class ClientSideFilterEngine:
             return posts
         
         # Remove exact duplicates by ID
-        posts = posts.drop_duplicates(subset=['id'], keep='first')
+        keep = ~posts['id'].duplicated(keep='first').to_numpy()
         
-        # Remove near-duplicates by title similarity
-        posts['title_hash'] = posts['title'].fillna('').apply(
-            lambda x: hashlib.md5(x.lower().strip().encode()).hexdigest()[:8]
-        )
-        posts = posts.drop_duplicates(subset=['title_hash'], keep='first')
+        # Remove near-duplicates by title similarity, among ID survivors only
+        title_hash = pd.util.hash_pandas_object(
+            posts['title'].fillna('').str.lower().str.strip(), index=False
+        ).to_numpy()
+        survivors = np.flatnonzero(keep)
+        keep[survivors[pd.Series(title_hash[survivors]).duplicated(keep='first').to_numpy()]] = False
         
-        return posts
+        # Single row slice for both passes
+        return posts[keep]
     
     def _calculate_relevance_scores(self, posts: pd.DataFrame, request: ClientSideFilterRequest) -> pd.DataFrame:
         """Calculate composite relevance scores"""
@@ -698,9 +984,11 @@ class ClientSideFilterEngine:
         if 'semantic_score' in posts.columns:
             posts['relevance_score'] += posts['semantic_score'] * 0.3
         
-        # Recency score
-        posts['days_old'] = (datetime.utcnow() - posts['created_date']).dt.days
-        posts['recency_score'] = 1.0 / (1 + posts['days_old'] / 30)
+        # Recency score (whole days since creation, computed on int64 epoch ns)
+        now_ns = np.datetime64(datetime.utcnow(), 'ns').astype(np.int64)
+        created_ns = posts['created_date'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+        days_old = (now_ns - created_ns) // NS_PER_DAY
+        posts['recency_score'] = 1.0 / (1.0 + days_old / 30.0)
         posts['relevance_score'] += posts['recency_score'] * 0.2
         
         # Normalize to 0-1
@@ -722,7 +1010,14 @@ class ClientSideFilterEngine:
                           'score', 'url', 'relevance_score']
         columns_to_save = [col for col in columns_to_save if col in posts.columns]
         
-        posts[columns_to_save].to_json(output_path, orient='records', lines=True)
+        if request.output_format == "parquet":
+            # Columnar + zstd: smaller on disk and keeps numeric dtypes on reload
+            output_path = output_path.with_suffix('.parquet')
+            posts[columns_to_save].to_parquet(
+                output_path, engine='pyarrow', compression='zstd', index=False
+            )
+        else:
+            posts[columns_to_save].to_json(output_path, orient='records', lines=True)
         
         return str(output_path)
     
@@ -742,15 +1037,38 @@ class ClientSideFilterEngine:
 class LocalSubTargeting:
     """Geographic targeting and subreddit discovery"""
     
+    __slots__ = ('metro_configs', '_proc_index')
+    
     def __init__(self):
         self.metro_configs = self._load_metro_configs()
+        # (PROC mtime, processed JSONL names, subreddit -> matching paths)
+        self._proc_index = None
+        
+    def _files_for_subreddit(self, sub_clean: str) -> List[Path]:
+        """Processed JSONL files whose name contains the subreddit"""
+        mtime = PROC.stat().st_mtime_ns
+        if self._proc_index is None or self._proc_index[0] != mtime:
+            # One directory listing per PROC change instead of a glob per subreddit
+            names = sorted(
+                entry.name for entry in os.scandir(PROC)
+                if entry.name.endswith('.jsonl') and entry.is_file()
+            )
+            self._proc_index = (mtime, names, {})
         
+        _, names, by_subreddit = self._proc_index
+        if sub_clean not in by_subreddit:
+            by_subreddit[sub_clean] = [
+                PROC / name for name in names if sub_clean in name[:-len('.jsonl')]
+            ]
+        return by_subreddit[sub_clean]
+    
     def _load_metro_configs(self) -> Dict:
         """Load metro area configurations"""
         config_path = CFG / "cities.yml"
         if config_path.exists():
-            import yaml
-            return yaml.safe_load(config_path.read_text())
+            # Cached parse is shared, so hand each instance its own copy to mutate
+            cached = _load_yaml_cached(str(config_path), config_path.stat().st_mtime_ns)
+            return copy.deepcopy(cached)
         
         # Default configurations
         return {
@@ -785,11 +1103,11 @@ class LocalSubTargeting:
             # Discover new subreddits if requested
             if request.discover_new_subs:
                 new_subs = await self._discover_related_subs(metro, metro_config)
-                metro_config['subreddits'] = list(set(metro_config.get('subreddits', []) + new_subs))
+                metro_config['subreddits'] = list(dict.fromkeys(metro_config.get('subreddits', []) + new_subs))
             
             # Apply regional keywords
             if metro in request.regional_keywords:
-                metro_config['keywords'] = list(set(
+                metro_config['keywords'] = list(dict.fromkeys(
                     metro_config.get('keywords', []) + request.regional_keywords[metro]
                 ))
             
@@ -838,31 +1156,30 @@ class LocalSubTargeting:
             'price_mentions': {'format': '', 'range': {}}
         }
         
-        # Load recent posts for this metro
+        # Stream recent posts for this metro, aggregating in a single pass
         try:
-            metro_posts = []
+            timestamps = []
+            titles = []
             for sub in config.get('subreddits', []):
                 sub_clean = sub.replace('r/', '')
-                for file_path in PROC.glob(f"*{sub_clean}*.jsonl"):
-                    df = pd.read_json(file_path, lines=True)
-                    metro_posts.append(df)
+                for file_path in self._files_for_subreddit(sub_clean):
+                    for record in iter_jsonl(file_path, ('created_utc', 'title')):
+                        # Posts without a timestamp would all land on the epoch
+                        if record.get('created_utc'):
+                            timestamps.append(record['created_utc'])
+                        if record.get('title'):
+                            titles.append(record['title'])
             
-            if metro_posts:
-                df = pd.concat(metro_posts, ignore_index=True)
-                
-                # Analyze posting times
-                df['hour'] = pd.to_datetime(df['created_utc'], unit='s').dt.hour
-                df['day'] = pd.to_datetime(df['created_utc'], unit='s').dt.day_name()
-                
-                patterns['peak_hours'] = df['hour'].value_counts().head(3).index.tolist()
-                patterns['peak_days'] = df['day'].value_counts().head(3).index.tolist()
+            if timestamps:
+                # Analyze posting times straight from the epoch seconds
+                ts = np.asarray(timestamps, dtype=np.int64)
+                hours = (ts // 3600) % 24
+                weekdays = ((ts // 86400) + 3) % 7  # 1970-01-01 was a Thursday (Monday == 0)
+                patterns['peak_hours'] = [hour for hour, _ in Counter(hours.tolist()).most_common(3)]
+                patterns['peak_days'] = [WEEKDAY_NAMES[day] for day, _ in Counter(weekdays.tolist()).most_common(3)]
                 
                 # Extract common topics
-                text = ' '.join(df['title'].fillna('').tolist())
-                words = text.lower().split()
-                word_freq = Counter(words)
-                patterns['common_topics'] = [w for w, _ in word_freq.most_common(10) 
-                                            if len(w) > 4 and w not in ['would', 'could', 'should']]
+                patterns['common_topics'] = top_title_tokens(titles, 10, TOPIC_STOPWORDS)
                 
         except Exception as e:
             logger.warning(f"Error analyzing patterns for {metro}: {e}")
@@ -877,50 +1194,61 @@ class LocalSubTargeting:
     
     def _update_metro_configs(self, results: Dict):
         """Update metro configurations file"""
-        self.metro_configs['metros'].update(results)
+        metros = self.metro_configs['metros']
+        if all(metros.get(metro) == details for metro, details in results.items()):
+            # Nothing changed, skip re-serializing the whole file
+            return
+        
+        metros.update(results)
         
         config_path = CFG / "cities.yml"
-        import yaml
-        config_path.write_text(yaml.dump(self.metro_configs, default_flow_style=False))
+        config_path.write_text(yaml.dump(self.metro_configs, Dumper=YamlDumper, default_flow_style=False))
 
 # ============================================================================
 # Technique 5: Vertical/Niche Specialization
 # ============================================================================
 
+# Built-in vertical lexicons (immutable; callers copy before extending)
+VERTICAL_LEXICONS = {
+    VerticalCategory.OFFICE: (
+        'class a', 'class b', 'sublease', 'coworking', 'amenities',
+        'conference room', 'reception', 'build-out', 'tenant improvement'
+    ),
+    VerticalCategory.RETAIL: (
+        'foot traffic', 'anchor tenant', 'inline', 'pad site', 'drive-thru',
+        'shopping center', 'strip mall', 'big box', 'qsr', 'fast casual'
+    ),
+    VerticalCategory.INDUSTRIAL: (
+        'warehouse', 'distribution', 'logistics', 'loading dock', 'clear height',
+        'cross-dock', 'rail served', 'cold storage', 'flex space'
+    ),
+    VerticalCategory.MULTIFAMILY: (
+        'units', 'bedroom', 'amenities', 'pool', 'fitness', 'pet friendly',
+        'concierge', 'parking ratio', 'occupancy', 'rent roll'
+    ),
+    VerticalCategory.HOSPITALITY: (
+        'adr', 'revpar', 'occupancy rate', 'flag', 'franchise', 'boutique',
+        'limited service', 'full service', 'extended stay'
+    ),
+    VerticalCategory.MIXED_USE: (
+        'live work play', 'ground floor retail', 'residential over retail',
+        'transit oriented', 'walkable', 'mixed income'
+    )
+}
+
+# Arrow scan pattern over each vertical's top-10 terms, built once
+VERTICAL_SCAN_PATTERNS = {
+    vertical: vertical_scan_pattern(terms[:10]) for vertical, terms in VERTICAL_LEXICONS.items()
+}
+
 class VerticalSpecializer:
     """Specialized targeting for CRE verticals"""
     
-    def __init__(self):
-        self.vertical_lexicons = self._initialize_vertical_lexicons()
-        
-    def _initialize_vertical_lexicons(self) -> Dict:
-        """Initialize vertical-specific lexicons"""
-        return {
-            VerticalCategory.OFFICE: [
-                'class a', 'class b', 'sublease', 'coworking', 'amenities',
-                'conference room', 'reception', 'build-out', 'tenant improvement'
-            ],
-            VerticalCategory.RETAIL: [
-                'foot traffic', 'anchor tenant', 'inline', 'pad site', 'drive-thru',
-                'shopping center', 'strip mall', 'big box', 'qsr', 'fast casual'
-            ],
-            VerticalCategory.INDUSTRIAL: [
-                'warehouse', 'distribution', 'logistics', 'loading dock', 'clear height',
-                'cross-dock', 'rail served', 'cold storage', 'flex space'
-            ],
-            VerticalCategory.MULTIFAMILY: [
-                'units', 'bedroom', 'amenities', 'pool', 'fitness', 'pet friendly',
-                'concierge', 'parking ratio', 'occupancy', 'rent roll'
-            ],
-            VerticalCategory.HOSPITALITY: [
-                'adr', 'revpar', 'occupancy rate', 'flag', 'franchise', 'boutique',
-                'limited service', 'full service', 'extended stay'
-            ],
-            VerticalCategory.MIXED_USE: [
-                'live work play', 'ground floor retail', 'residential over retail',
-                'transit oriented', 'walkable', 'mixed income'
-            ]
-        }
+    __slots__ = ('vertical_lexicons', 'pool')
+    
+    def __init__(self, pool: Optional[Executor] = None):
+        self.vertical_lexicons = VERTICAL_LEXICONS
+        self.pool = pool
     
     async def specialize_verticals(self, request: VerticalSpecializationRequest) -> Dict:
         """Apply vertical specialization to intelligence gathering"""
@@ -929,7 +1257,7 @@ class VerticalSpecializer:
         
         for vertical in request.verticals:
             # Get base lexicon
-            base_lexicon = self.vertical_lexicons.get(vertical, [])
+            base_lexicon = list(self.vertical_lexicons.get(vertical, ()))
             
             # Add custom terms
             if vertical.value in request.custom_lexicons:
@@ -976,7 +1304,7 @@ class VerticalSpecializer:
         conflicts = conflict_terms.get(vertical, [])
         cleaned = [term for term in lexicon if not any(c in term.lower() for c in conflicts)]
         
-        return list(set(cleaned))
+        return list(dict.fromkeys(cleaned))
     
     async def _analyze_vertical(self, vertical: VerticalCategory, lexicon: List[str]) -> Dict:
         """Analyze vertical-specific patterns and opportunities"""
@@ -988,39 +1316,46 @@ class VerticalSpecializer:
             'competitive_landscape': {}
         }
         
+        # An empty term would turn the alternation into a match-everything scan
+        terms = tuple(term for term in lexicon[:10] if term)  # Top 10 terms
+        if not terms:
+            return analysis
+        
+        # Skip empty/near-empty files on their stat alone
+        file_paths = [
+            path for path in sorted(PROC.glob("filtered_*.jsonl"))
+            if path.stat().st_size >= MIN_JSONL_RECORD_BYTES
+        ]
+        if not file_paths:
+            return analysis
+        
         # Load posts containing vertical terms
         try:
-            vertical_posts = []
-            for file_path in PROC.glob("filtered_*.jsonl"):
-                df = pd.read_json(file_path, lines=True)
-                
-                # Filter for vertical relevance
-                pattern = '|'.join([re.escape(term) for term in lexicon[:10]])  # Top 10 terms
-                if pattern:
-                    mask = df['selftext'].fillna('').str.contains(pattern, case=False, na=False)
-                    vertical_df = df[mask]
-                    if not vertical_df.empty:
-                        vertical_posts.append(vertical_df)
+            post_volume = 0
+            titles = []
+            # Reuse the prebuilt pattern unless custom terms or conflict pruning changed the top 10
+            if VERTICAL_LEXICONS.get(vertical, ())[:10] == terms:
+                pattern = VERTICAL_SCAN_PATTERNS[vertical]
+            else:
+                pattern = vertical_scan_pattern(terms)
+            scans = await map_files_in_processes(
+                functools.partial(_scan_vertical_file, pattern=pattern), file_paths, self.pool
+            )
+            for count, file_titles in scans:
+                post_volume += count
+                titles.extend(file_titles[:100 - len(titles)])
             
-            if vertical_posts:
-                combined = pd.concat(vertical_posts, ignore_index=True)
-                
-                analysis['post_volume'] = len(combined)
-                analysis['relevance_score'] = min(len(combined) / 100, 1.0)  # Normalize
+            if post_volume:
+                analysis['post_volume'] = post_volume
+                analysis['relevance_score'] = min(post_volume / 100, 1.0)  # Normalize
                 
                 # Extract trending topics
-                text = ' '.join(combined['title'].fillna('').tolist()[:100])
-                words = [w for w in text.lower().split() if len(w) > 4]
-                word_freq = Counter(words)
-                analysis['trending_topics'] = [w for w, _ in word_freq.most_common(5)]
+                analysis['trending_topics'] = top_title_tokens(titles, 5)
+                text = ' '.join(titles)
                 
-                # Identify market signals
-                if 'lease' in text.lower():
-                    analysis['market_signals'].append('leasing_activity')
-                if 'sale' in text.lower() or 'acquisition' in text.lower():
-                    analysis['market_signals'].append('transaction_activity')
-                if 'development' in text.lower() or 'construction' in text.lower():
-                    analysis['market_signals'].append('development_pipeline')
+                # Identify market signals in a single case-insensitive scan
+                found = {MARKET_SIGNAL_BY_TERM[m.group(0).lower()] for m in MARKET_SIGNAL_RE.finditer(text)}
+                analysis['market_signals'] = [signal for signal, _ in MARKET_SIGNAL_TERMS if signal in found]
                 
         except Exception as e:
             logger.warning(f"Error analyzing vertical {vertical}: {e}")
@@ -1080,7 +1415,7 @@ class VerticalSpecializer:
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         path = CFG / f"verticals_{timestamp}.json"
         
-        path.write_text(json.dumps(results, indent=2, default=str))
+        path.write_bytes(orjson.dumps(results, option=ORJSON_PRETTY, default=str))
         return str(path)
 
 # ============================================================================
@@ -1090,8 +1425,12 @@ class VerticalSpecializer:
 class DualSortStrategy:
     """Implement dual-sort strategy for comprehensive coverage"""
     
-    def __init__(self):
-        self.dedup_cache = set()
+    __slots__ = ('dedup_cache', 'pool')
+    
+    def __init__(self, pool: Optional[Executor] = None):
+        # Integer keys of every post id seen (see post_id_key)
+        self.dedup_cache: Set[int] = set()
+        self.pool = pool
         
     async def execute_dual_sort(self, request: DualSortStrategyRequest) -> Dict:
         """Execute dual-sort strategy for comprehensive data collection"""
@@ -1159,39 +1498,47 @@ class DualSortStrategy:
         # In production, this would call Reddit API with specific sort
         # For now, simulate with existing data
         try:
-            posts = []
-            for file_path in RAW.glob("*.jsonl"):
-                df = pd.read_json(file_path, lines=True)
-                
-                # Apply sort strategy logic
-                if strategy == SortStrategy.NEW:
-                    df = df.sort_values('created_utc', ascending=False)
-                elif strategy == SortStrategy.RELEVANCE:
-                    if 'score' in df.columns:
-                        df = df.sort_values('score', ascending=False)
-                elif strategy == SortStrategy.TOP:
-                    if 'score' in df.columns:
-                        df = df.nlargest(100, 'score')
-                elif strategy == SortStrategy.HOT:
-                    # Hot = recent + high engagement
-                    df['hot_score'] = df['score'] / (1 + (datetime.utcnow().timestamp() - df['created_utc']) / 86400)
-                    df = df.sort_values('hot_score', ascending=False)
-                
-                posts.append(df.head(100))  # Limit per file
+            # Rank each file by the sort strategy in parallel, top 100 per file
+            file_paths = sorted(RAW.glob("*.jsonl"))
+            per_file = await map_files_in_processes(
+                functools.partial(
+                    _collect_file_top_records,
+                    strategy=strategy.value,
+                    now_ts=datetime.utcnow().timestamp()
+                ),
+                file_paths,
+                self.pool
+            )
+            posts = list(itertools.chain.from_iterable(per_file))
             
             if posts:
-                combined = pd.concat(posts, ignore_index=True)
-                collection['count'] = len(combined)
+                collection['count'] = len(posts)
+                
+                # Calculate quality metrics in one pass; missing values are
+                # skipped the way pandas' mean/nunique would skip NaN
+                score_sum = score_n = comments_sum = comments_n = 0
+                subreddits = set()
+                for record in posts:
+                    score = record.get('score')
+                    if score is not None:
+                        score_sum += score
+                        score_n += 1
+                    num_comments = record.get('num_comments')
+                    if num_comments is not None:
+                        comments_sum += num_comments
+                        comments_n += 1
+                    subreddit = record.get('subreddit')
+                    if subreddit is not None:
+                        subreddits.add(subreddit)
                 
-                # Calculate quality metrics
                 collection['quality_metrics'] = {
-                    'avg_score': float(combined['score'].mean()) if 'score' in combined.columns else 0,
-                    'avg_comments': float(combined['num_comments'].mean()) if 'num_comments' in combined.columns else 0,
-                    'unique_subreddits': combined['subreddit'].nunique() if 'subreddit' in combined.columns else 0
+                    'avg_score': score_sum / score_n if score_n else 0,
+                    'avg_comments': comments_sum / comments_n if comments_n else 0,
+                    'unique_subreddits': len(subreddits)
                 }
                 
                 # Save strategy-specific collection
-                self._save_strategy_collection(combined, strategy)
+                self._save_strategy_collection(posts, strategy)
                 
         except Exception as e:
             logger.warning(f"Error collecting with strategy {strategy}: {e}")
@@ -1207,42 +1554,50 @@ class DualSortStrategy:
             'duplicate_pairs': []
         }
         
-        all_posts = []
-        
-        for strategy, collection in collections.items():
-            # Load the strategy-specific collection
-            strategy_file = PROC / f"dual_sort_{strategy}_latest.jsonl"
-            if strategy_file.exists():
-                df = pd.read_json(strategy_file, lines=True)
-                all_posts.append(df)
-                stats['total_before'] += len(df)
+        strategy_files = [
+            PROC / f"dual_sort_{strategy}_latest.jsonl" for strategy in collections
+        ]
+        strategy_files = [path for path in strategy_files if path.exists()]
+        if not strategy_files:
+            return stats
+        
+        seen_ids, seen_urls, seen_titles = set(), set(), set()
+        
+        # Stream survivors straight to the deduplicated collection
+        dedup_path = PROC / f"dual_sort_dedup_{datetime.utcnow().strftime('%Y%m%d')}.jsonl"
+        with open(dedup_path, 'wb', buffering=1 << 20) as out:
+            for strategy_file in strategy_files:
+                for record in iter_jsonl(strategy_file):
+                    stats['total_before'] += 1
+                    
+                    # Same precedence as sequential id -> url -> title passes:
+                    # each key only competes against records that survived the
+                    # previous one
+                    post_id = record.get('id')
+                    if post_id in seen_ids:
+                        continue
+                    seen_ids.add(post_id)
+                    
+                    url = record.get('url')
+                    if url is not None:
+                        if url in seen_urls:
+                            continue
+                        seen_urls.add(url)
+                    
+                    # Remove by title similarity (fuzzy)
+                    title_key = (record.get('title') or '').strip().casefold()
+                    if title_key in seen_titles:
+                        continue
+                    seen_titles.add(title_key)
+                    
+                    out.write(orjson.dumps(record))
+                    out.write(b'\n')
+                    stats['total_after'] += 1
+                    
+                    # Update dedup cache
+                    self.dedup_cache.add(post_id_key(post_id))
         
-        if all_posts:
-            combined = pd.concat(all_posts, ignore_index=True)
-            
-            # Track duplicates
-            before_dedup = len(combined)
-            
-            # Remove by ID
-            combined = combined.drop_duplicates(subset=['id'], keep='first')
-            
-            # Remove by URL
-            if 'url' in combined.columns:
-                combined = combined.drop_duplicates(subset=['url'], keep='first')
-            
-            # Remove by title similarity (fuzzy)
-            combined['title_key'] = combined['title'].fillna('').str.lower().str.strip()
-            combined = combined.drop_duplicates(subset=['title_key'], keep='first')
-            
-            stats['total_after'] = len(combined)
-            stats['duplicates_removed'] = before_dedup - stats['total_after']
-            
-            # Update dedup cache
-            self.dedup_cache.update(combined['id'].tolist())
-            
-            # Save deduplicated collection
-            dedup_path = PROC / f"dual_sort_dedup_{datetime.utcnow().strftime('%Y%m%d')}.jsonl"
-            combined.to_json(dedup_path, orient='records', lines=True)
+        stats['duplicates_removed'] = stats['total_before'] - stats['total_after']
         
         return stats
     
@@ -1262,32 +1617,34 @@ class DualSortStrategy:
             for strategy, collection in collections.items():
                 strategy_file = PROC / f"dual_sort_{strategy}_latest.jsonl"
                 if strategy_file.exists():
-                    df = pd.read_json(strategy_file, lines=True)
-                    df['date'] = pd.to_datetime(df['created_utc'], unit='s').dt.date
+                    created = [r.get('created_utc') for r in iter_jsonl(strategy_file, ('created_utc',))]
+                    # Records without a timestamp count as posts but cover no day
+                    ts = np.fromiter((c for c in created if c), dtype=np.float64).astype(np.int64)
+                    # Integer day buckets (days since epoch) instead of date objects
+                    days = np.unique(ts // 86400)
                     
-                    for date_val in df['date'].unique():
-                        date_coverage[date_val].add(strategy)
+                    for day in days.tolist():
+                        date_coverage[day].add(strategy)
                     
                     analysis['coverage_by_strategy'][strategy] = {
-                        'posts': len(df),
-                        'days_covered': df['date'].nunique(),
-                        'completeness': df['date'].nunique() / timeframe_days
+                        'posts': len(created),
+                        'days_covered': len(days),
+                        'completeness': len(days) / timeframe_days
                     }
             
             # Identify gaps
-            expected_dates = pd.date_range(
-                end=datetime.utcnow().date(),
-                periods=timeframe_days
-            ).date
+            today = int(time.time()) // 86400
+            expected_days = range(today - timeframe_days + 1, today + 1)
             
-            for expected_date in expected_dates:
-                if expected_date not in date_coverage:
-                    analysis['gaps'].append(str(expected_date))
+            for expected_day in expected_days:
+                day_label = datetime.utcfromtimestamp(expected_day * 86400).date().isoformat()
+                if expected_day not in date_coverage:
+                    analysis['gaps'].append(day_label)
                 else:
-                    analysis['coverage_by_day'][str(expected_date)] = list(date_coverage[expected_date])
+                    analysis['coverage_by_day'][day_label] = list(date_coverage[expected_day])
             
             # Calculate overall coverage score
-            analysis['score'] = len(date_coverage) / len(expected_dates)
+            analysis['score'] = len(date_coverage) / len(expected_days)
             
         except Exception as e:
             logger.warning(f"Error analyzing coverage: {e}")
@@ -1325,17 +1682,17 @@ class DualSortStrategy:
         
         return backfill
     
-    def _save_strategy_collection(self, df: pd.DataFrame, strategy: SortStrategy):
+    def _save_strategy_collection(self, records: List[Dict], strategy: SortStrategy):
         """Save collection for specific strategy"""
         path = PROC / f"dual_sort_{strategy.value}_latest.jsonl"
-        df.to_json(path, orient='records', lines=True)
+        path.write_bytes(b''.join(orjson.dumps(record) + b'\n' for record in records))
     
     def _save_dual_sort_results(self, results: Dict) -> str:
         """Save comprehensive dual-sort results"""
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         path = PROC / f"dual_sort_results_{timestamp}.json"
         
-        path.write_text(json.dumps(results, indent=2, default=str))
+        path.write_bytes(orjson.dumps(results, option=ORJSON_PRETTY, default=str))
         return str(path)
     
     def _generate_summary(self, results: Dict) -> Dict:
@@ -1355,13 +1712,23 @@ class DualSortStrategy:
 # API Endpoints
 # ============================================================================
 
-# Initialize technique implementations
-payload_optimizer = PayloadOptimizer()
-phrase_miner = PhraseMiner()
-filter_engine = ClientSideFilterEngine()
-local_targeter = LocalSubTargeting()
-vertical_specializer = VerticalSpecializer()
-dual_sort_strategy = DualSortStrategy()
+class Techniques:
+    """Technique implementations shared by every request in a worker"""
+    
+    def __init__(self, pool: Optional[Executor] = None):
+        self.payload_optimizer = PayloadOptimizer()
+        self.phrase_miner = PhraseMiner()
+        self.filter_engine = ClientSideFilterEngine(pool)
+        self.local_targeter = LocalSubTargeting()
+        self.vertical_specializer = VerticalSpecializer(pool)
+        self.dual_sort_strategy = DualSortStrategy(pool)
+
+def get_techniques(request: Request) -> Techniques:
+    """Techniques built by the lifespan handler (or on first use if it never ran)"""
+    state = request.app.state
+    if not hasattr(state, 'techniques'):
+        state.techniques = Techniques()
+    return state.techniques
 
 @app.get("/")
 async def root():
@@ -1381,111 +1748,203 @@ async def root():
     }
 
 @app.post("/optimize_payload")
-async def optimize_payload(request: PayloadOptimizationRequest):
+async def optimize_payload(request: PayloadOptimizationRequest, techniques: Techniques = Depends(get_techniques)):
     """Technique 1: Iterative JSON payload refinement"""
     try:
-        result = await payload_optimizer.optimize_payload(request)
-        return result
+        result = await techniques.payload_optimizer.optimize_payload(request)
+        return CREJSONResponse(content=result)
     except Exception as e:
         logger.error(f"Payload optimization failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/mine_phrases")
-async def mine_phrases(request: PhraseMiningRequest):
+async def mine_phrases(request: PhraseMiningRequest, techniques: Techniques = Depends(get_techniques)):
     """Technique 2: TF-IDF phrase mining with classification"""
     try:
-        result = await phrase_miner.mine_phrases(request)
-        return result
+        result = await techniques.phrase_miner.mine_phrases(request)
+        return CREJSONResponse(content=result)
     except Exception as e:
         logger.error(f"Phrase mining failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/filter_posts")
-async def filter_posts(request: ClientSideFilterRequest):
+async def filter_posts(request: ClientSideFilterRequest, techniques: Techniques = Depends(get_techniques)):
     """Technique 3: 6-stage client-side filtering"""
     try:
-        result = await filter_engine.filter_posts(request)
-        return result
+        result = await techniques.filter_engine.filter_posts(request)
+        return CREJSONResponse(content=result)
     except Exception as e:
         logger.error(f"Post filtering failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/target_local_subs")
-async def target_local_subs(request: LocalSubTargetingRequest):
+async def target_local_subs(request: LocalSubTargetingRequest, techniques: Techniques = Depends(get_techniques)):
     """Technique 4: Geographic targeting and expansion"""
     try:
-        result = await local_targeter.target_local_subs(request)
-        return result
+        result = await techniques.local_targeter.target_local_subs(request)
+        return CREJSONResponse(content=result)
     except Exception as e:
         logger.error(f"Local targeting failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/specialize_verticals")
-async def specialize_verticals(request: VerticalSpecializationRequest):
+async def specialize_verticals(request: VerticalSpecializationRequest, techniques: Techniques = Depends(get_techniques)):
     """Technique 5: Vertical market specialization"""
     try:
-        result = await vertical_specializer.specialize_verticals(request)
-        return result
+        result = await techniques.vertical_specializer.specialize_verticals(request)
+        return CREJSONResponse(content=result)
     except Exception as e:
         logger.error(f"Vertical specialization failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/execute_dual_sort")
-async def execute_dual_sort(request: DualSortStrategyRequest):
+async def execute_dual_sort(request: DualSortStrategyRequest, techniques: Techniques = Depends(get_techniques)):
     """Technique 6: Dual-sort strategy execution"""
     try:
-        result = await dual_sort_strategy.execute_dual_sort(request)
-        return result
+        result = await techniques.dual_sort_strategy.execute_dual_sort(request)
+        return CREJSONResponse(content=result)
     except Exception as e:
         logger.error(f"Dual-sort execution failed: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# Tool name -> (request model, Techniques attribute, method) for /batch
+BATCH_TOOLS = {
+    'optimize_payload': (PayloadOptimizationRequest, 'payload_optimizer', 'optimize_payload'),
+    'mine_phrases': (PhraseMiningRequest, 'phrase_miner', 'mine_phrases'),
+    'filter_posts': (ClientSideFilterRequest, 'filter_engine', 'filter_posts'),
+    'target_local_subs': (LocalSubTargetingRequest, 'local_targeter', 'target_local_subs'),
+    'specialize_verticals': (VerticalSpecializationRequest, 'vertical_specializer', 'specialize_verticals'),
+    'execute_dual_sort': (DualSortStrategyRequest, 'dual_sort_strategy', 'execute_dual_sort')
+}
+
+# "$<call id>" followed by .key steps (mapped over lists; missing keys read as
+# empty, e.g. top_terms of an unsuccessful mine_phrases) and [:n] slices
+BATCH_REF_RE = re.compile(r'\$([\w-]+)((?:\.\w+|\[:\d+\])*)')
+BATCH_REF_STEP_RE = re.compile(r'\.(\w+)|\[:(\d+)\]')
+
+def resolve_batch_ref(ref: str, results: Dict[str, Any]) -> Any:
+    """Evaluate an input_from reference against the results of earlier calls"""
+    match = BATCH_REF_RE.fullmatch(ref)
+    if match is None:
+        raise ValueError(f"Invalid batch reference: {ref}")
+    if match.group(1) not in results:
+        raise ValueError(f"Referenced call {match.group(1)} did not succeed")
+    
+    value = results[match.group(1)]
+    for key, limit in BATCH_REF_STEP_RE.findall(match.group(2)):
+        if key:
+            value = [item[key] for item in value] if isinstance(value, list) else value.get(key, [])
+        else:
+            value = value[:int(limit)]
+    return value
+
+def batch_layers(calls: List[BatchCall]) -> List[List[BatchCall]]:
+    """Group calls so every call only references calls in earlier layers"""
+    pending = {str(call.id): call for call in calls}
+    if len(pending) != len(calls):
+        raise HTTPException(status_code=400, detail="Batch call ids must be unique")
+    
+    deps = {}
+    for call_id, call in pending.items():
+        matches = [BATCH_REF_RE.fullmatch(ref) for ref in call.input_from.values()]
+        deps[call_id] = {match.group(1) for match in matches if match is not None}
+        deps[call_id].update(str(dep) for dep in call.after)
+        if not deps[call_id] <= pending.keys():
+            raise HTTPException(status_code=400, detail=f"Call {call_id} references an unknown call")
+    
+    layers = []
+    done = set()
+    while pending:
+        layer = [call for call_id, call in pending.items() if deps[call_id] <= done]
+        if not layer:
+            raise HTTPException(status_code=400, detail="Batch calls have a circular reference")
+        for call in layer:
+            del pending[str(call.id)]
+            done.add(str(call.id))
+        layers.append(layer)
+    return layers
+
+async def _run_batch_call(call: BatchCall, results: Dict[str, Any], techniques: Techniques) -> Dict[str, Any]:
+    try:
+        if call.tool not in BATCH_TOOLS:
+            raise ValueError(f"Unknown tool: {call.tool}")
+        model, attr, method = BATCH_TOOLS[call.tool]
+        args = {**call.args}
+        for name, ref in call.input_from.items():
+            args[name] = resolve_batch_ref(ref, results)
+        result = await getattr(getattr(techniques, attr), method)(model(**args))
+        return {'id': call.id, 'ok': True, 'result': result}
+    except Exception as e:
+        logger.error(f"Batch call {call.id} ({call.tool}) failed: {e}")
+        return {'id': call.id, 'ok': False, 'error': str(e)}
+
+@app.post("/batch")
+async def batch(request: BatchRequest, techniques: Techniques = Depends(get_techniques)):
+    """Run several tools in one request, layer by layer; a failed call only fails its dependents"""
+    outcomes = {}
+    results = {}
+    for layer in batch_layers(request.calls):
+        for outcome in await asyncio.gather(*(_run_batch_call(call, results, techniques) for call in layer)):
+            outcomes[str(outcome['id'])] = outcome
+            if outcome['ok']:
+                results[str(outcome['id'])] = outcome['result']
+    
+    ordered = [outcomes[str(call.id)] for call in request.calls]
+    return CREJSONResponse(content={
+        'ok': all(outcome['ok'] for outcome in ordered),
+        'results': ordered
+    })
+
 # Composite endpoint for full pipeline execution
 @app.post("/execute_full_pipeline")
 async def execute_full_pipeline(
     metros: List[str],
     verticals: List[VerticalCategory],
     date_start: str,
-    date_end: str
+    date_end: str,
+    techniques: Techniques = Depends(get_techniques)
 ):
     """Execute complete intelligence pipeline with all techniques"""
     try:
         results = {}
         
-        # Step 1: Optimize payloads
+        # Steps 1 & 2: payload optimization and phrase mining are independent
         payload_req = PayloadOptimizationRequest(
             subreddits=["r/commercialrealestate"] + [f"r/{m}" for m in metros],
             keywords=["lease", "rent", "property", "commercial", "tenant"],
             date_start=date_start,
             date_end=date_end
         )
-        results['payload_optimization'] = await payload_optimizer.optimize_payload(payload_req)
-        
-        # Step 2: Mine phrases
         phrase_req = PhraseMiningRequest()
-        results['phrase_mining'] = await phrase_miner.mine_phrases(phrase_req)
+        results['payload_optimization'], results['phrase_mining'] = await asyncio.gather(
+            techniques.payload_optimizer.optimize_payload(payload_req),
+            techniques.phrase_miner.mine_phrases(phrase_req)
+        )
         
-        # Step 3: Filter posts
+        # Step 3: Filter posts (needs the mined terms)
         filter_req = ClientSideFilterRequest(
             date_start=date_start,
             date_end=date_end,
             keywords=results['phrase_mining']['top_terms'][:10] if results['phrase_mining']['ok'] else []
         )
-        results['filtering'] = await filter_engine.filter_posts(filter_req)
+        results['filtering'] = await techniques.filter_engine.filter_posts(filter_req)
         
-        # Step 4: Target local subs
+        # Steps 4-6: local targeting, vertical specialization and dual-sort
+        # only read what step 3 left on disk, so run them concurrently
         local_req = LocalSubTargetingRequest(metro_areas=metros)
-        results['local_targeting'] = await local_targeter.target_local_subs(local_req)
-        
-        # Step 5: Specialize verticals
         vertical_req = VerticalSpecializationRequest(verticals=verticals)
-        results['vertical_specialization'] = await vertical_specializer.specialize_verticals(vertical_req)
-        
-        # Step 6: Execute dual-sort
         dual_req = DualSortStrategyRequest()
-        results['dual_sort'] = await dual_sort_strategy.execute_dual_sort(dual_req)
+        (
+            results['local_targeting'],
+            results['vertical_specialization'],
+            results['dual_sort']
+        ) = await asyncio.gather(
+            techniques.local_targeter.target_local_subs(local_req),
+            techniques.vertical_specializer.specialize_verticals(vertical_req),
+            techniques.dual_sort_strategy.execute_dual_sort(dual_req)
+        )
         
-        return {
+        return CREJSONResponse(content={
             'ok': True,
             'pipeline_complete': True,
             'techniques_executed': 6,
@@ -1496,7 +1955,7 @@ async def execute_full_pipeline(
                 'metros_covered': len(metros),
                 'verticals_analyzed': len(verticals)
             }
-        }
+        })
         
     except Exception as e:
         logger.error(f"Pipeline execution failed: {e}")
@@ -1504,7 +1963,18 @@ async def execute_full_pipeline(
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Workers need an import string; one event loop per core. "auto" uses uvloop and
+    # httptools where they are installed (not on Windows) and falls back otherwise
+    uvicorn.run(
+        "src.mcp.fastapi_app.main:app",
+        app_dir=str(BASE.parent),
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.environ.get("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="auto",
+        http="auto",
+        log_level="info"
+    )
 # ============================================================================
 # Streaming Support for Large Tasks
 # ============================================================================
@@ -5,52 +5,108 @@ Provides the same tools as FastAPI but through MCP protocol
 """
 
 import asyncio
-import json
+import hashlib
+import itertools
 import logging
-from typing import Dict, Any, List, Optional
+import os
+import time
+import orjson
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from weakref import WeakSet
+from typing import Dict, Any, List, Optional, Set, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
-from pathlib import Path
 import websockets
 from websockets.server import WebSocketServerProtocol
 
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+try:
+    import uvloop  # shipped with uvicorn[standard]; unavailable on Windows
+except ImportError:
+    uvloop = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Import the core implementations from FastAPI module
-import sys
-sys.path.append(str(Path(__file__).parent.parent.parent))
-
+# (run as a package: python -m mcp.native_server.server)
 from mcp.fastapi_app.main import (
     PayloadOptimizer,
     PhraseMiner,
     ClientSideFilterEngine,
     LocalSubTargeting,
     VerticalSpecializer,
-    DualSortStrategy
+    DualSortStrategy,
+    VerticalCategory,
+    SortStrategy,
+    PayloadOptimizationRequest,
+    PhraseMiningRequest,
+    ClientSideFilterRequest,
+    LocalSubTargetingRequest,
+    VerticalSpecializationRequest,
+    DualSortStrategyRequest
 )
 
 # ============================================================================
 # MCP Protocol Implementation
 # ============================================================================
 
+# Upper bound on tool handlers running at once across all connections
+MAX_IN_FLIGHT = int(os.environ.get('MCP_MAX_INFLIGHT', '256'))
+
+# Full-pipeline stages, in the order results are reported
+PIPELINE_STAGES = (
+    'payload_optimization',
+    'phrase_mining',
+    'filtering',
+    'local_targeting',
+    'vertical_specialization',
+    'dual_sort'
+)
+
+# Wire value -> enum member, avoiding Enum.__call__ per item
+VERTICAL_LOOKUP = {v.value: v for v in VerticalCategory}
+SORT_STRATEGY_LOOKUP = {s.value: s for s in SortStrategy}
+
+def _lookup_members(lookup: Dict[str, Any], values: List[str], kind: str) -> List[Any]:
+    """Map wire values to enum members with a readable error on unknown values"""
+    try:
+        return [lookup[v] for v in values]
+    except KeyError as e:
+        raise ValueError(f"Unknown {kind}: {e.args[0]!r} (expected one of {sorted(lookup)})") from None
+
+# Fixed frames, serialized once
+INVALID_JSON_RESPONSE = orjson.dumps({'error': 'Invalid JSON'}).decode()
+TOOLS_LIST_REQUEST = orjson.dumps({'id': '1', 'method': 'tools.list', 'params': {}}).decode()
+
 @dataclass
 class MCPMessage:
     """MCP Protocol Message"""
+    # Explicit rather than dataclass(slots=True), which needs Python 3.10
+    __slots__ = ('id', 'method', 'params')
+    
     id: str
     method: str
     params: Dict[str, Any]
     
     @classmethod
     def from_json(cls, data: str) -> 'MCPMessage':
-        """Parse MCP message from JSON"""
-        parsed = json.loads(data)
-        return cls(
-            id=parsed.get('id', ''),
-            method=parsed.get('method', ''),
-            params=parsed.get('params', {})
-        )
+        """Parse and shape-check an MCP message (orjson errors subclass ValueError)"""
+        parsed = orjson.loads(data)
+        if not isinstance(parsed, dict):
+            raise ValueError("MCP message must be a JSON object")
+        msg_id = parsed.get('id', '')
+        method = parsed.get('method', '')
+        params = parsed.get('params') or {}
+        if not isinstance(method, str) or not isinstance(params, dict):
+            raise ValueError("MCP message needs a string 'method' and object 'params'")
+        return cls(msg_id, method, params)
     
     def to_response(self, result: Any = None, error: Any = None) -> str:
         """Create response message"""
@@ -67,7 +123,14 @@ class MCPMessage:
         else:
             response['result'] = result
             
-        return json.dumps(response)
+        # Text frame for JSON-RPC clients; numpy values from the tools serialize natively
+        return orjson.dumps(
+            response, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS, default=str
+        ).decode()
+
+    def build_response_bytes(self, result_json: bytes) -> bytes:
+        """Success response around an already-serialized result, without re-encoding it"""
+        return b'{"id":' + orjson.dumps(self.id) + b',"jsonrpc":"2.0","result":' + result_json + b'}'
 
 @dataclass
 class MCPToolDefinition:
@@ -77,6 +140,77 @@ class MCPToolDefinition:
     parameters: Dict[str, Any]
     handler: Any  # Callable
 
+# ============================================================================
+# Pipeline Stage Cache
+# ============================================================================
+
+class StageCache:
+    """Per-stage LRU of pipeline results keyed on a canonical hash of the stage params"""
+    
+    def __init__(self, max_entries: int = 128, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl  # seconds; stages read corpora that change over time
+        self._entries: Dict[str, OrderedDict] = {}
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+    
+    @staticmethod
+    def key(params: Dict[str, Any]) -> bytes:
+        """Order-independent digest of a params dict, stable across processes"""
+        encoded = orjson.dumps(params, option=orjson.OPT_SORT_KEYS, default=str)
+        if xxhash is not None:
+            return xxhash.xxh3_128_digest(encoded)
+        return hashlib.blake2b(encoded, digest_size=16).digest()
+    
+    def get(self, stage: str, key: bytes) -> Optional[Any]:
+        """Return a fresh cached result or None"""
+        entries = self._entries.get(stage)
+        entry = entries.get(key) if entries is not None else None
+        if entry is None:
+            self.misses += 1
+            return None
+        if time.monotonic() - entry[0] > self.ttl:
+            del entries[key]  # expired; free it now rather than waiting for LRU eviction
+            self.expirations += 1
+            self.misses += 1
+            return None
+        entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+    
+    def put(self, stage: str, key: bytes, result: Any):
+        """Store a result, evicting the least recently used entry when full"""
+        entries = self._entries.setdefault(stage, OrderedDict())
+        entries[key] = (time.monotonic(), result)
+        entries.move_to_end(key)
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop all cached results"""
+        self._entries.clear()
+    
+    def get_state(self) -> Dict[str, Any]:
+        """Hit/miss counters and per-stage sizes"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'expirations': self.expirations,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': {stage: len(entries) for stage, entries in self._entries.items()},
+            'max_entries': self.max_entries,
+            'ttl': self.ttl
+        }
+
+# Fixed full-pipeline inputs; handlers get shallow copies since some rewrite params
+PIPELINE_BASE_SUBREDDIT = "r/commercialrealestate"
+PIPELINE_KEYWORDS = ("lease", "rent", "property", "commercial", "tenant")
+PIPELINE_PHRASE_PARAMS = {"corpus_source": "last_month", "top_k": 100}
+PIPELINE_DUAL_PARAMS = {"timeframe_days": 30, "sort_strategies": ["new", "relevance"]}
+PIPELINE_PHRASE_KEY = StageCache.key(PIPELINE_PHRASE_PARAMS)
+
 # ============================================================================
 # MCP Server Implementation
 # ============================================================================
@@ -88,7 +222,12 @@ class CREIntelligenceMCPServer:
         self.host = host
         self.port = port
         self.tools: Dict[str, MCPToolDefinition] = {}
-        self.connections: set = set()
+        self.connections: WeakSet = WeakSet()  # entries vanish with their sockets
+        
+        # Tool listing shared by the capabilities frame and tools.list,
+        # rebuilt lazily after register_tool()
+        self._tools_list_json: Optional[bytes] = None
+        self._capabilities_json: Optional[str] = None
         
         # Initialize tool implementations
         self.payload_optimizer = PayloadOptimizer()
@@ -97,6 +236,12 @@ class CREIntelligenceMCPServer:
         self.local_targeter = LocalSubTargeting()
         self.vertical_specializer = VerticalSpecializer()
         self.dual_sort_strategy = DualSortStrategy()
+        self.pipeline_cache = StageCache()
+        
+        # Backpressure on tool dispatch, plus time spent waiting for a slot; the semaphore
+        # is built in start() since on Python 3.9 it binds to the loop current at construction
+        self._handler_sem: Optional[asyncio.Semaphore] = None
+        self.handler_wait_stats = {'calls': 0, 'total_wait': 0.0, 'max_wait': 0.0}
         
         # Register tools
         self._register_tools()
@@ -143,7 +288,8 @@ class CREIntelligenceMCPServer:
                 "exclude_keywords": {"type": "array", "items": {"type": "string"}},
                 "quality_thresholds": {"type": "object"},
                 "semantic_similarity_threshold": {"type": "number"},
-                "city": {"type": "string", "nullable": True}
+                "city": {"type": "string", "nullable": True},
+                "output_format": {"type": "string", "enum": ["jsonl", "parquet"], "default": "jsonl"}
             },
             handler=self._handle_filter_posts
         )
@@ -198,6 +344,7 @@ class CREIntelligenceMCPServer:
             handler=self._handle_full_pipeline
         )
         
+        self._tool_listing_json()  # serialize the listing before the first connection
         logger.info(f"Registered {len(self.tools)} MCP tools")
     
     def register_tool(
@@ -214,46 +361,60 @@ class CREIntelligenceMCPServer:
             parameters=parameters,
             handler=handler
         )
+        self._tools_list_json = None
+        self._capabilities_json = None
+    
+    def _tool_listing_json(self) -> bytes:
+        """Serialized tools.list result, built once per registry change"""
+        if self._tools_list_json is None:
+            tool_descriptors = [
+                {
+                    'name': tool.name,
+                    'description': tool.description,
+                    'parameters': tool.parameters
+                }
+                for tool in self.tools.values()
+            ]
+            self._tools_list_json = orjson.dumps(tool_descriptors)
+            self._capabilities_json = (
+                b'{"type":"capabilities","tools":' + self._tools_list_json + b'}'
+            ).decode()
+        return self._tools_list_json
+    
+    def _capabilities_frame(self) -> str:
+        """Capabilities message sent on connect, sharing the tools.list serialization"""
+        self._tool_listing_json()
+        return self._capabilities_json
     
     async def _handle_optimize_payload(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle payload optimization requests"""
-        from mcp.fastapi_app.main import PayloadOptimizationRequest
-        
         request = PayloadOptimizationRequest(**params)
         result = await self.payload_optimizer.optimize_payload(request)
         return result
     
     async def _handle_mine_phrases(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle phrase mining requests"""
-        from mcp.fastapi_app.main import PhraseMiningRequest
-        
         request = PhraseMiningRequest(**params)
         result = await self.phrase_miner.mine_phrases(request)
         return result
     
     async def _handle_filter_posts(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle post filtering requests"""
-        from mcp.fastapi_app.main import ClientSideFilterRequest
-        
         request = ClientSideFilterRequest(**params)
         result = await self.filter_engine.filter_posts(request)
         return result
     
     async def _handle_target_local_subs(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle local subreddit targeting requests"""
-        from mcp.fastapi_app.main import LocalSubTargetingRequest
-        
         request = LocalSubTargetingRequest(**params)
         result = await self.local_targeter.target_local_subs(request)
         return result
     
     async def _handle_specialize_verticals(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle vertical specialization requests"""
-        from mcp.fastapi_app.main import VerticalSpecializationRequest, VerticalCategory
-        
         # Convert string verticals to enum
         if 'verticals' in params:
-            params['verticals'] = [VerticalCategory(v) for v in params['verticals']]
+            params['verticals'] = _lookup_members(VERTICAL_LOOKUP, params['verticals'], 'vertical')
         
         request = VerticalSpecializationRequest(**params)
         result = await self.vertical_specializer.specialize_verticals(request)
@@ -261,55 +422,121 @@ class CREIntelligenceMCPServer:
     
     async def _handle_execute_dual_sort(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle dual-sort strategy requests"""
-        from mcp.fastapi_app.main import DualSortStrategyRequest, SortStrategy
-        
         # Convert string strategies to enum
         if 'sort_strategies' in params:
-            params['sort_strategies'] = [SortStrategy(s) for s in params['sort_strategies']]
+            params['sort_strategies'] = _lookup_members(SORT_STRATEGY_LOOKUP, params['sort_strategies'], 'sort strategy')
         
         request = DualSortStrategyRequest(**params)
         result = await self.dual_sort_strategy.execute_dual_sort(request)
         return result
     
+    async def _dispatch(self, tool: MCPToolDefinition, params: Dict[str, Any]) -> Any:
+        """Run a tool handler once an in-flight slot is free"""
+        queued_at = time.monotonic()
+        async with self._handler_sem:
+            waited = time.monotonic() - queued_at
+            stats = self.handler_wait_stats
+            stats['calls'] += 1
+            stats['total_wait'] += waited
+            stats['max_wait'] = max(stats['max_wait'], waited)
+            return await tool.handler(params)
+    
+    async def _cached_stage(
+        self,
+        stage: str,
+        handler: Any,
+        params: Dict[str, Any],
+        key: Optional[bytes] = None
+    ) -> Any:
+        """Run a pipeline stage, reusing a cached result for identical params"""
+        if key is None:
+            key = StageCache.key(params)  # before the handler, which may mutate params
+        result = self.pipeline_cache.get(stage, key)
+        if result is None:
+            result = await handler(params)
+            if not (isinstance(result, dict) and result.get('ok') is False):
+                self.pipeline_cache.put(stage, key, result)
+        return result
+    
     async def _handle_full_pipeline(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle full pipeline execution requests"""
         # Implement full pipeline orchestration
         results = {}
         
         try:
-            # Step 1: Optimize payloads
+            # Canonical params so reordered/duplicated metros and verticals share cache entries
+            params = {
+                **params,
+                'metros': sorted(set(params['metros'])),
+                'verticals': sorted(set(params['verticals']))
+            }
+            
+            # Steps 1 and 2 are independent; step 3 waits on step 2, and steps 4-6
+            # read the filtered files step 3 writes, so they start once it finishes
             payload_params = {
-                "subreddits": ["r/commercialrealestate"] + [f"r/{m}" for m in params['metros']],
-                "keywords": ["lease", "rent", "property", "commercial", "tenant"],
+                "subreddits": [PIPELINE_BASE_SUBREDDIT] + [f"r/{m}" for m in params['metros']],
+                "keywords": list(PIPELINE_KEYWORDS),
                 "date_start": params['date_start'],
                 "date_end": params['date_end']
             }
-            results['payload_optimization'] = await self._handle_optimize_payload(payload_params)
+            local_params = {"metro_areas": params['metros']}
+            vertical_params = {"verticals": params['verticals']}
             
-            # Step 2: Mine phrases
-            phrase_params = {"corpus_source": "last_month", "top_k": 100}
-            results['phrase_mining'] = await self._handle_mine_phrases(phrase_params)
+            tasks = {
+                'payload_optimization': asyncio.create_task(self._cached_stage(
+                    'payload_optimization', self._handle_optimize_payload, payload_params)),
+                'phrase_mining': asyncio.create_task(self._cached_stage(
+                    'phrase_mining', self._handle_mine_phrases,
+                    dict(PIPELINE_PHRASE_PARAMS), PIPELINE_PHRASE_KEY))
+            }
             
-            # Step 3: Filter posts
-            top_terms = results['phrase_mining'].get('top_terms', [])[:10]
+            # Step 3: Filter posts with the mined terms
+            try:
+                top_terms = (await tasks['phrase_mining']).get('top_terms', [])[:10]
+            except Exception:
+                top_terms = []  # reported below with the other stage errors
             filter_params = {
                 "date_start": params['date_start'],
                 "date_end": params['date_end'],
                 "keywords": [t['term'] for t in top_terms] if top_terms else []
             }
-            results['filtering'] = await self._handle_filter_posts(filter_params)
+            tasks['filtering'] = asyncio.create_task(self._cached_stage(
+                'filtering', self._handle_filter_posts, filter_params))
+            await asyncio.wait([tasks['filtering']])  # errors are reported below
             
-            # Step 4: Target local subs
-            local_params = {"metro_areas": params['metros']}
-            results['local_targeting'] = await self._handle_target_local_subs(local_params)
+            # Steps 4-6 read every filtered file, so their cache keys include the one step 3
+            # produced; a filtering run that wrote a new file invalidates their entries
+            try:
+                filtered_output = tasks['filtering'].result().get('output_path')
+            except Exception:
+                filtered_output = None
             
-            # Step 5: Specialize verticals
-            vertical_params = {"verticals": params['verticals']}
-            results['vertical_specialization'] = await self._handle_specialize_verticals(vertical_params)
+            def stage_key(stage_params: Dict[str, Any]) -> bytes:
+                return StageCache.key({**stage_params, '_filtered_output': filtered_output})
+            
+            # Steps 4-6 run concurrently with each other (and with step 1 if still going)
+            tasks['local_targeting'] = asyncio.create_task(self._cached_stage(
+                'local_targeting', self._handle_target_local_subs,
+                local_params, stage_key(local_params)))
+            tasks['vertical_specialization'] = asyncio.create_task(self._cached_stage(
+                'vertical_specialization', self._handle_specialize_verticals,
+                vertical_params, stage_key(vertical_params)))
+            tasks['dual_sort'] = asyncio.create_task(self._cached_stage(
+                'dual_sort', self._handle_execute_dual_sort,
+                dict(PIPELINE_DUAL_PARAMS), stage_key(PIPELINE_DUAL_PARAMS)))
             
-            # Step 6: Execute dual-sort
-            dual_params = {"timeframe_days": 30, "sort_strategies": ["new", "relevance"]}
-            results['dual_sort'] = await self._handle_execute_dual_sort(dual_params)
+            outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+            stage_results = dict(zip(tasks, outcomes))
+            
+            errors = []
+            for stage in PIPELINE_STAGES:
+                outcome = stage_results[stage]
+                if isinstance(outcome, Exception):
+                    errors.append(f"{stage}: {outcome}")
+                else:
+                    results[stage] = outcome
+            if errors:
+                raise RuntimeError("; ".join(errors))
             
             return {
                 'ok': True,
@@ -331,86 +558,96 @@ class CREIntelligenceMCPServer:
         
         self.connections.add(websocket)
         logger.info(f"New connection from {websocket.remote_address}")
+        # tools.call runs as a task per message so pipelined calls overlap;
+        # _dispatch still bounds how many handlers run at once
+        pending: Set[asyncio.Task] = set()
         
         try:
             # Send server capabilities on connect
-            await websocket.send(json.dumps({
-                'type': 'capabilities',
-                'tools': [
-                    {
-                        'name': tool.name,
-                        'description': tool.description,
-                        'parameters': tool.parameters
-                    }
-                    for tool in self.tools.values()
-                ]
-            }))
+            await websocket.send(self._capabilities_frame())
             
             # Handle messages
             async for message in websocket:
                 try:
                     msg = MCPMessage.from_json(message)
-                    logger.info(f"Received: {msg.method}")
-                    
-                    # Route to appropriate handler
-                    if msg.method == "tools.list":
-                        # List available tools
-                        result = [
-                            {
-                                'name': tool.name,
-                                'description': tool.description,
-                                'parameters': tool.parameters
-                            }
-                            for tool in self.tools.values()
-                        ]
-                        await websocket.send(msg.to_response(result=result))
-                        
-                    elif msg.method == "tools.call":
-                        # Execute tool
-                        tool_name = msg.params.get('name')
-                        tool_params = msg.params.get('params', {})
-                        
-                        if tool_name in self.tools:
-                            tool = self.tools[tool_name]
-                            try:
-                                result = await tool.handler(tool_params)
-                                await websocket.send(msg.to_response(result=result))
-                            except Exception as e:
-                                logger.error(f"Tool execution error: {str(e)}")
-                                await websocket.send(msg.to_response(error=str(e)))
-                        else:
-                            await websocket.send(msg.to_response(error=f"Unknown tool: {tool_name}"))
-                            
-                    else:
-                        await websocket.send(msg.to_response(error=f"Unknown method: {msg.method}"))
-                        
-                except json.JSONDecodeError:
+                except orjson.JSONDecodeError:
                     logger.error("Invalid JSON received")
-                    await websocket.send(json.dumps({
-                        'error': 'Invalid JSON'
-                    }))
-                except Exception as e:
-                    logger.error(f"Message handling error: {str(e)}")
-                    await websocket.send(json.dumps({
+                    await websocket.send(INVALID_JSON_RESPONSE)
+                    continue
+                except ValueError as e:
+                    logger.error(f"Malformed message: {str(e)}")
+                    await websocket.send(orjson.dumps({
                         'error': str(e)
-                    }))
+                    }).decode())
+                    continue
+                
+                logger.info(f"Received: {msg.method}")
+                
+                # Route to appropriate handler
+                if msg.method == "tools.list":
+                    # List available tools
+                    await websocket.send(
+                        msg.build_response_bytes(self._tool_listing_json()).decode()
+                    )
+                    
+                elif msg.method == "tools.call":
+                    # Execute tool
+                    task = asyncio.create_task(self._call_tool(websocket, msg))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                        
+                else:
+                    await websocket.send(msg.to_response(error=f"Unknown method: {msg.method}"))
                     
         except websockets.ConnectionClosed:
             logger.info(f"Connection closed from {websocket.remote_address}")
         finally:
-            self.connections.remove(websocket)
+            for task in pending:
+                task.cancel()
+            self.connections.discard(websocket)
+    
+    async def _call_tool(self, websocket: WebSocketServerProtocol, msg: MCPMessage):
+        """Run one tools.call message and send its response"""
+        tool_name = msg.params.get('name')
+        tool_params = msg.params.get('params', {})
+        
+        if tool_name in self.tools:
+            try:
+                result = await self._dispatch(self.tools[tool_name], tool_params)
+                response = msg.to_response(result=result)
+            except Exception as e:
+                logger.error(f"Tool execution error: {str(e)}")
+                response = msg.to_response(error=str(e))
+        else:
+            response = msg.to_response(error=f"Unknown tool: {tool_name}")
+        
+        try:
+            await websocket.send(response)
+        except websockets.ConnectionClosed:
+            logger.info(f"Connection closed before {tool_name} response was sent")
     
     async def start(self):
         """Start the MCP server"""
         logger.info(f"Starting MCP server on ws://{self.host}:{self.port}")
+        self._handler_sem = asyncio.Semaphore(MAX_IN_FLIGHT)
+        
+        # One process pool shared by the file-reading techniques while the server runs
+        pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1)
+        for technique in (self.filter_engine, self.vertical_specializer, self.dual_sort_strategy):
+            technique.pool = pool
         
-        async with websockets.serve(
-            self.handle_connection,
-            self.host,
-            self.port
-        ):
-            logger.info(f"MCP server listening on ws://{self.host}:{self.port}")
-            await asyncio.Future()  # Run forever
+        try:
+            async with websockets.serve(
+                self.handle_connection,
+                self.host,
+                self.port
+            ):
+                logger.info(f"MCP server listening on ws://{self.host}:{self.port}")
+                await asyncio.Future()  # Run forever
+        finally:
+            for technique in (self.filter_engine, self.vertical_specializer, self.dual_sort_strategy):
+                technique.pool = None
+            await asyncio.to_thread(pool.shutdown)
 
 # ============================================================================
 # MCP Client for Testing
@@ -422,6 +659,7 @@ class MCPTestClient:
     def __init__(self, url: str):
         self.url = url
         self.websocket = None
+        self._batch_ids = itertools.count()
         
     async def connect(self):
         """Connect to MCP server"""
@@ -433,38 +671,64 @@ class MCPTestClient:
         
     async def list_tools(self) -> List[Dict]:
         """List available tools"""
-        message = json.dumps({
-            'id': '1',
-            'method': 'tools.list',
-            'params': {}
-        })
-        
-        await self.websocket.send(message)
+        await self.websocket.send(TOOLS_LIST_REQUEST)
         response = await self.websocket.recv()
-        result = json.loads(response)
+        result = orjson.loads(response)
         
         return result.get('result', [])
     
     async def call_tool(self, name: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Call a tool"""
-        message = json.dumps({
+        message = orjson.dumps({
             'id': '2',
             'method': 'tools.call',
             'params': {
                 'name': name,
                 'params': params
             }
-        })
+        }).decode()
         
         await self.websocket.send(message)
         response = await self.websocket.recv()
-        result = json.loads(response)
+        result = orjson.loads(response)
         
         if 'error' in result:
             raise Exception(result['error'])
             
         return result.get('result', {})
     
+    async def call_tools_batch(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Any]:
+        """Pipeline several tool calls over the socket, matching responses by id"""
+        ids = [f"batch-{next(self._batch_ids)}" for _ in calls]
+        for msg_id, (name, params) in zip(ids, calls):
+            await self.websocket.send(orjson.dumps({
+                'id': msg_id,
+                'method': 'tools.call',
+                'params': {
+                    'name': name,
+                    'params': params
+                }
+            }).decode())
+        
+        # Replies may arrive in any order; drain every one before raising so the
+        # socket stays in sync
+        responses = {}
+        expected = set(ids)
+        while expected:
+            result = orjson.loads(await self.websocket.recv())
+            msg_id = result.get('id')
+            if msg_id is None:
+                # Error frame with no id (e.g. invalid JSON); no reply would ever match it
+                raise Exception(result.get('error', 'Response without an id'))
+            if msg_id in expected:
+                expected.discard(msg_id)
+                responses[msg_id] = result
+        
+        for msg_id in ids:
+            if 'error' in responses[msg_id]:
+                raise Exception(responses[msg_id]['error'])
+        return [responses[msg_id].get('result', {}) for msg_id in ids]
+    
     async def disconnect(self):
         """Disconnect from server"""
         if self.websocket:
@@ -485,6 +749,9 @@ def main():
     
     args = parser.parse_args()
     
+    if uvloop is not None:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    
     if args.test:
         # Run test client
         async def test():
@@ -4,13 +4,58 @@ Comprehensive monitoring and health checking for agents
 """
 import asyncio
 import logging
-from typing import Dict, Any, Optional, Deque
+import time
+from typing import Callable, Dict, Any, Optional, Deque
 from dataclasses import dataclass
 from collections import deque
-from datetime import datetime
+
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Rolling numeric windows: metrics key reported by the agent -> self.metrics key
+ROLLING_METRICS = {
+    "response_time": "response_times",
+    "token_usage": "token_usage",
+    "error_rate": "error_rates"
+}
+
+# Metrics compared against alert_thresholds when judging degradation
+DEGRADED_METRICS = ("response_time", "error_rate", "token_usage")
+
+class RingBuffer:
+    """Fixed-size float32 window of the most recent samples"""
+    
+    __slots__ = ('data', 'size', '_idx')
+    
+    def __init__(self, size: int):
+        self.data = np.zeros(size, dtype=np.float32)
+        self.size = size
+        self._idx = 0
+    
+    def append(self, value: float):
+        self.data[self._idx % self.size] = value
+        self._idx += 1
+    
+    def __len__(self) -> int:
+        return min(self._idx, self.size)
+    
+    def values(self) -> np.ndarray:
+        """Filled part of the window (not in arrival order once it wraps)"""
+        return self.data[:len(self)]
+    
+    def mean(self) -> float:
+        values = self.values()
+        return float(values.mean()) if len(values) else 0.0
+    
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile via partial selection"""
+        values = self.values()
+        if not len(values):
+            return 0.0
+        k = int(round(q / 100 * (len(values) - 1)))
+        return float(np.partition(values, k)[k])
+
 @dataclass
 class MonitorConfig:
     """Configuration for AgentMonitor"""
@@ -25,7 +70,7 @@ class HealthStatus:
     def __init__(self):
         self.status = "unknown"
         self.degraded = False
-        self.last_check = None
+        self.last_check: Optional[float] = None  # time.monotonic()
         self.metrics = {}
         self.alerts = []
     
@@ -49,9 +94,9 @@ class AgentMonitor:
         )
         
         self.metrics = {
-            'response_times': deque(maxlen=self.config.metrics_window_size),
-            'token_usage': deque(maxlen=self.config.metrics_window_size),
-            'error_rates': deque(maxlen=self.config.metrics_window_size),
+            'response_times': RingBuffer(self.config.metrics_window_size),
+            'token_usage': RingBuffer(self.config.metrics_window_size),
+            'error_rates': RingBuffer(self.config.metrics_window_size),
             'connection_status': deque(maxlen=self.config.metrics_window_size),
             'last_successful_call': None,
             'total_calls': 0,
@@ -60,6 +105,14 @@ class AgentMonitor:
         
         self.health_status = HealthStatus()
         self.logger = logging.getLogger(__name__)
+        
+        # (metric, limit) pairs checked by _is_degraded, resolved once
+        thresholds = self.config.alert_thresholds or {}
+        self._degraded_limits = tuple(
+            (key, thresholds[key])
+            for key in DEGRADED_METRICS
+            if thresholds.get(key) is not None
+        )
     
     async def monitor_health(self):
         """Continuous health monitoring"""
@@ -73,7 +126,7 @@ class AgentMonitor:
     async def check_agent_health(self, agent_checker: callable) -> HealthStatus:
         """Check agent health using provided checker function"""
         health = HealthStatus()
-        health.last_check = datetime.now()
+        health.last_check = time.monotonic()
         
         try:
             # Get agent metrics
@@ -103,14 +156,9 @@ class AgentMonitor:
         if not metrics:
             return
             
-        if "response_time" in metrics:
-            self.metrics['response_times'].append(metrics["response_time"])
-            
-        if "token_usage" in metrics:
-            self.metrics['token_usage'].append(metrics["token_usage"])
-            
-        if "error_rate" in metrics:
-            self.metrics['error_rates'].append(metrics["error_rate"])
+        for key, window in ROLLING_METRICS.items():
+            if key in metrics:
+                self.metrics[window].append(metrics[key])
             
         if "connection_status" in metrics:
             self.metrics['connection_status'].append(metrics["connection_status"])
@@ -119,6 +167,17 @@ class AgentMonitor:
         if metrics.get("success") is False:
             self.metrics['failed_calls'] += 1
     
+    def get_window_stats(self) -> Dict[str, Dict[str, float]]:
+        """Mean and p95 over each rolling metrics window"""
+        return {
+            window: {
+                'mean': self.metrics[window].mean(),
+                'p95': self.metrics[window].percentile(95),
+                'samples': len(self.metrics[window])
+            }
+            for window in ROLLING_METRICS.values()
+        }
+    
     def _determine_health_status(self, metrics: Dict[str, Any]) -> str:
         """Determine overall health status based on metrics"""
         if self._is_degraded(metrics):
@@ -129,27 +188,11 @@ class AgentMonitor:
         """Check if agent is degraded based on thresholds"""
         if not metrics:
             return False
-            
-        thresholds = self.config.alert_thresholds
-        if not thresholds:
-            return False
         
-        # Check response time
-        if ("response_time" in metrics and 
-            metrics["response_time"] > thresholds.get("response_time", float('inf'))):
-            return True
-            
-        # Check error rate
-        if ("error_rate" in metrics and 
-            metrics["error_rate"] > thresholds.get("error_rate", float('inf'))):
-            return True
-            
-        # Check token usage
-        if ("token_usage" in metrics and 
-            metrics["token_usage"] > thresholds.get("token_usage", float('inf'))):
-            return True
-            
-        return False
+        return any(
+            key in metrics and metrics[key] > limit
+            for key, limit in self._degraded_limits
+        )
     
     def publish_metrics(self, metrics: Dict[str, Any]):
         """Publish metrics to monitoring system"""
@@ -159,4 +202,53 @@ class AgentMonitor:
     async def alert_and_mitigate(self, health: HealthStatus):
         """Alert on health issues and attempt mitigation"""
         # In a real implementation, this would send alerts and attempt recovery
-        pass
\ No newline at end of file
+        pass
+
+class AgentMonitorRegistry:
+    """Runs health checks for many monitors off a single shared timer"""
+    
+    def __init__(self, interval: float = 30.0):
+        self.interval = interval  # seconds
+        self._agents: Dict[AgentMonitor, Callable] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def register(self, monitor: AgentMonitor, agent_checker: Callable):
+        """Poll `agent_checker` through `monitor` on every tick"""
+        self._agents[monitor] = agent_checker
+    
+    def unregister(self, monitor: AgentMonitor):
+        self._agents.pop(monitor, None)
+    
+    def start(self):
+        """Start the shared polling task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the shared polling task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            # Ticks sit on a fixed grid so slow checks don't push later ones back
+            next_tick += self.interval
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+            if loop.time() - next_tick > self.interval:
+                next_tick = loop.time()  # fell a whole interval behind, skip the backlog
+            
+            agents = list(self._agents.items())
+            results = await asyncio.gather(
+                *(monitor.check_agent_health(checker) for monitor, checker in agents),
+                return_exceptions=True
+            )
+            for result in results:
+                if isinstance(result, Exception):
+                    logger.error(f"Error in shared monitoring loop: {result}")
@@ -4,6 +4,7 @@ Prevents cascading failures in distributed systems
 """
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta
 from enum import Enum
 from typing import Any, Callable, Optional, Dict
@@ -39,7 +40,7 @@ class CircuitBreaker:
         self.expected_exception = expected_exception
         
         self.failure_count = 0
-        self.last_failure_time: Optional[datetime] = None
+        self.last_failure_time: Optional[float] = None  # time.monotonic()
         self.state = CircuitState.CLOSED
         self.lock = asyncio.Lock()
         
@@ -49,13 +50,8 @@ class CircuitBreaker:
         """Decorator for protecting functions with circuit breaker"""
         @functools.wraps(func)
         async def wrapper(*args, **kwargs):
-            async with self.lock:
-                if self.state == CircuitState.OPEN:
-                    if self._should_attempt_reset():
-                        self.state = CircuitState.HALF_OPEN
-                        logger.info("Circuit breaker half-open, testing service")
-                    else:
-                        raise CircuitBreakerOpen("Circuit breaker is OPEN")
+            if self.state != CircuitState.CLOSED:
+                await self._before_call()
             
             try:
                 result = await func(*args, **kwargs)
@@ -73,13 +69,8 @@ class CircuitBreaker:
     
     async def call(self, func: Callable, *args, **kwargs) -> Any:
         """Call a function protected by the circuit breaker"""
-        async with self.lock:
-            if self.state == CircuitState.OPEN:
-                if self._should_attempt_reset():
-                    self.state = CircuitState.HALF_OPEN
-                    logger.info("Circuit breaker half-open, testing service")
-                else:
-                    raise CircuitBreakerOpen("Circuit breaker is OPEN")
+        if self.state != CircuitState.CLOSED:
+            await self._before_call()
         
         try:
             result = await func(*args, **kwargs)
@@ -93,16 +84,28 @@ class CircuitBreaker:
             await self._on_failure()
             raise
     
+    async def _before_call(self) -> None:
+        """Gate a call while the circuit is not closed (the closed path skips the lock)"""
+        async with self.lock:
+            if self.state == CircuitState.OPEN:
+                if self._should_attempt_reset():
+                    self.state = CircuitState.HALF_OPEN
+                    logger.info("Circuit breaker half-open, testing service")
+                else:
+                    raise CircuitBreakerOpen("Circuit breaker is OPEN")
+    
     def _should_attempt_reset(self) -> bool:
         """Check if we should attempt to reset the circuit"""
         if self.last_failure_time is None:
             return False
-        return datetime.now() >= self.last_failure_time + timedelta(seconds=self.recovery_timeout)
+        return time.monotonic() - self.last_failure_time >= self.recovery_timeout
     
     async def _on_success(self) -> None:
         """Handle successful call"""
+        self.failure_count = 0
+        if self.state == CircuitState.CLOSED:
+            return  # no transition, so no lock
         async with self.lock:
-            self.failure_count = 0
             if self.state == CircuitState.HALF_OPEN:
                 self.state = CircuitState.CLOSED
                 logger.info("Circuit breaker closed, service recovered")
@@ -113,10 +116,13 @@ class CircuitBreaker:
     
     async def _on_failure(self) -> None:
         """Handle failed call"""
+        # Plain updates with no await in between, so they can't interleave with another task
+        self.failure_count += 1
+        self.last_failure_time = time.monotonic()
+        if self.state == CircuitState.CLOSED and self.failure_count < self.failure_threshold:
+            return  # below threshold, no transition
+        
         async with self.lock:
-            self.failure_count += 1
-            self.last_failure_time = datetime.now()
-            
             if self.state == CircuitState.HALF_OPEN:
                 # Failed during test, go back to open
                 self.state = CircuitState.OPEN
@@ -128,11 +134,18 @@ class CircuitBreaker:
     
     def get_state(self) -> Dict[str, Any]:
         """Get current state information"""
+        if self.last_failure_time is None:
+            since_failure = None
+            last_failure = None
+        else:
+            since_failure = time.monotonic() - self.last_failure_time
+            last_failure = (datetime.now() - timedelta(seconds=since_failure)).isoformat()
         return {
             "state": self.state.value,
             "failure_count": self.failure_count,
             "failure_threshold": self.failure_threshold,
-            "last_failure_time": self.last_failure_time.isoformat() if self.last_failure_time else None,
+            "last_failure_time": last_failure,
+            "seconds_since_failure": since_failure,
             "recovery_timeout": self.recovery_timeout
         }
     
@@ -3,17 +3,27 @@ Dual Agent Coordinator
 Orchestrates both GooseAgent and QWEN3 in a supervisor-worker pattern
 """
 import asyncio
+import hashlib
+import itertools
 import logging
-from typing import Dict, Any, List, Optional
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set
 from dataclasses import dataclass
 import json
 from datetime import datetime
 
+import orjson
+
 # Import our resilient agent
 from src.goose.resilient_agent import ResilientGooseAgent, ResilientAgentConfig
+from src.orchestration.batching import BatchConfig, BatchingExecutor
 
 logger = logging.getLogger(__name__)
 
+# Append-only checkpoint log inside DualAgentConfig.checkpoint_dir
+CHECKPOINT_JOURNAL = "checkpoints.jsonl"
+
 @dataclass
 class DualAgentConfig:
     """Configuration for DualAgentCoordinator"""
@@ -21,6 +31,46 @@ class DualAgentConfig:
     max_task_size: int = 5000
     timeout_per_task: int = 60
     enable_fallback: bool = True
+    max_concurrency: int = 4  # subtasks in flight at once
+    chunk_size: int = 3  # tasks per decomposed subtask
+    enable_batching: bool = False  # coalesce subtasks across concurrent stories
+    batch_config: Optional[BatchConfig] = None
+    checkpoint_dir: Optional[str] = None  # journal checkpoints here when set
+    checkpoint_queue_size: int = 1024
+    checkpoint_ring_size: int = 1000  # checkpoints kept in memory
+
+def story_size_chars(story: Any) -> int:
+    """Size of a story's compact JSON form, without building its Python repr"""
+    return len(orjson.dumps(story, option=orjson.OPT_NON_STR_KEYS, default=str))
+
+class SubtaskHasher:
+    """Content hash of subtask dicts that reuses encodings of shared nested values"""
+    
+    _OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+    
+    def __init__(self, max_entries: int = 1024):
+        # id(value) -> (value, encoded); holding the value keeps its id from being reused.
+        # Nested values are treated as read-only, as StoryFragmenter already assumes.
+        self._cache: Dict[int, tuple] = {}
+        self.max_entries = max_entries
+    
+    def _encode(self, value: Any) -> bytes:
+        if not isinstance(value, (dict, list)):
+            return orjson.dumps(value, option=self._OPTIONS, default=str)
+        cached = self._cache.get(id(value))
+        if cached is not None and cached[0] is value:
+            return cached[1]
+        encoded = orjson.dumps(value, option=self._OPTIONS, default=str)
+        if len(self._cache) >= self.max_entries:
+            del self._cache[next(iter(self._cache))]
+        self._cache[id(value)] = (value, encoded)
+        return encoded
+    
+    def hexdigest(self, subtask: Dict[str, Any]) -> str:
+        digest = hashlib.blake2b(digest_size=16)
+        for key in sorted(subtask, key=str):
+            digest.update(orjson.dumps(str(key)) + b":" + self._encode(subtask[key]) + b",")
+        return digest.hexdigest()
 
 class QWEN3Supervisor:
     """QWEN3 supervisor implementation (placeholder)"""
@@ -31,10 +81,11 @@ class QWEN3Supervisor:
     async def validate_story(self, story: Dict[str, Any]) -> Dict[str, Any]:
         """Validate a BMAD story"""
         # In a real implementation, this would use QWEN3 to validate the story
+        story_chars = story_size_chars(story)
         return {
             "valid": True,
-            "requires_decomposition": len(str(story)) > 5000,
-            "estimated_tokens": len(str(story)) // 4,
+            "requires_decomposition": story_chars > 5000,
+            "estimated_tokens": story_chars // 4,
             "validation_notes": "Story appears valid"
         }
         
@@ -50,6 +101,8 @@ class QWEN3Supervisor:
 class BMADStory:
     """BMAD Story representation"""
     
+    __slots__ = ('id', 'name', 'tasks', 'outputs', 'acceptance_criteria', 'raw_data')
+    
     def __init__(self, story_data: Dict[str, Any]):
         self.id = story_data.get("id")
         self.name = story_data.get("name")
@@ -60,7 +113,7 @@ class BMADStory:
         
     def estimated_tokens(self) -> int:
         """Estimate the number of tokens in the story"""
-        return len(str(self.raw_data)) // 4
+        return story_size_chars(self.raw_data) // 4
 
 class DualAgentCoordinator:
     """Dual Agent Coordinator for GooseAgent and QWEN3"""
@@ -69,16 +122,52 @@ class DualAgentCoordinator:
         self.config = config or DualAgentConfig()
         self.logger = logging.getLogger(__name__)
         
-        # Initialize agents
-        goose_config = ResilientAgentConfig()
-        self.goose_agent = ResilientGooseAgent(goose_config)
+        # GooseAgent acquires an HTTP client, so it is built on first use (see goose_agent)
+        self._goose_agent: Optional[ResilientGooseAgent] = None
         self.qwen3_supervisor = QWEN3Supervisor()
         
-        # For checkpointing intermediate results
+        # For checkpointing intermediate results; subtask bodies are stored once
+        # in _subtask_blobs and checkpoints reference them by content hash
         self.checkpoint_storage: Dict[str, Any] = {}
+        self._subtask_blobs: Dict[str, Dict[str, Any]] = {}
+        self._blob_refs: Dict[str, int] = {}  # checkpoints in memory per blob
+        self._journaled_blobs: Set[str] = set()  # blob lines queued or written
+        self._checkpoint_seq = itertools.count(1)
+        self._hasher = SubtaskHasher()
         
-        # Task queue for processing
-        self.task_queue: asyncio.Queue = asyncio.Queue()
+        # Subtask content hash -> result replayed by recover_checkpoints(); these are
+        # not re-run, while a subtask whose content changed is
+        self.completed_subtasks: Dict[str, Any] = {}
+        
+        # Background writer for persisted checkpoints, started on first use; the queue is
+        # built alongside it since on Python 3.9 a Queue binds to the loop current at construction
+        self._checkpoint_queue: Optional[asyncio.Queue] = None
+        self._checkpoint_writer: Optional[asyncio.Task] = None
+        
+        self.batch_executor: Optional[BatchingExecutor] = None
+        if self.config.enable_batching:
+            self.batch_executor = BatchingExecutor(self._execute_subtask_batch, self.config.batch_config)
+    
+    @classmethod
+    async def create(
+        cls,
+        config: Optional[DualAgentConfig] = None,
+        goose_api_endpoint: Optional[str] = None
+    ) -> "DualAgentCoordinator":
+        """Build a coordinator with its GooseAgent ready, connecting it when an endpoint is given"""
+        self = cls(config)
+        if goose_api_endpoint is not None:
+            await self.goose_agent.connect(goose_api_endpoint)
+        else:
+            self.goose_agent  # build now rather than on the first subtask
+        return self
+    
+    @property
+    def goose_agent(self) -> ResilientGooseAgent:
+        """GooseAgent, constructed on first access"""
+        if self._goose_agent is None:
+            self._goose_agent = ResilientGooseAgent(ResilientAgentConfig())
+        return self._goose_agent
     
     async def execute_story(self, story_data: Dict[str, Any]) -> Dict[str, Any]:
         """Execute BMAD story with dual-agent coordination"""
@@ -90,17 +179,26 @@ class DualAgentCoordinator:
         if validation.get("requires_decomposition", False):
             # Break into smaller chunks for GooseAgent
             subtasks = await self.decompose_story(story)
-            results = []
+            semaphore = asyncio.Semaphore(self.config.max_concurrency)
             
-            for subtask in subtasks:
-                # Execute with automatic failover
-                result = await self.execute_subtask_with_failover(subtask)
-                results.append(result)
-                
+            async def run_subtask(subtask: Dict[str, Any]) -> Dict[str, Any]:
+                if self.completed_subtasks:
+                    subtask_ref = self._hasher.hexdigest(subtask)
+                    if subtask_ref in self.completed_subtasks:
+                        return self.completed_subtasks[subtask_ref]
+                async with semaphore:
+                    # Execute with automatic failover
+                    if self.batch_executor is not None:
+                        result = await self.batch_executor.submit(subtask)
+                    else:
+                        result = await self.execute_subtask_with_failover(subtask)
                 # Save intermediate state
                 await self.checkpoint_state(subtask, result)
+                return result
             
-            return self.merge_results(results)
+            # Subtasks are independent; gather keeps results in subtask order
+            results = await asyncio.gather(*(run_subtask(subtask) for subtask in subtasks))
+            return self.merge_results(list(results))
         else:
             # Execute directly with GooseAgent
             return await self.goose_agent.execute_with_fallback(
@@ -110,23 +208,26 @@ class DualAgentCoordinator:
     
     async def decompose_story(self, story: BMADStory) -> List[Dict[str, Any]]:
         """Decompose a large story into smaller subtasks"""
-        subtasks = []
+        tasks = story.tasks
+        chunk_size = self.config.chunk_size
         
         # If story has many tasks, break them into chunks
-        if len(story.tasks) > 3:  # For testing, use small chunks
-            for i in range(0, len(story.tasks), 3):
-                task_chunk = story.tasks[i:i+3]
-                subtask = {
-                    "id": f"{story.id}_part_{i//3 + 1}",
-                    "name": f"{story.name} - Part {i//3 + 1}",
-                    "tasks": task_chunk,
-                    "outputs": story.outputs,
-                    "acceptance_criteria": story.acceptance_criteria
+        if len(tasks) > chunk_size:
+            story_id, story_name = story.id, story.name
+            outputs, criteria = story.outputs, story.acceptance_criteria
+            subtasks = [
+                {
+                    "id": f"{story_id}_part_{part}",
+                    "name": f"{story_name} - Part {part}",
+                    "tasks": tasks[start:start + chunk_size],
+                    "outputs": outputs,
+                    "acceptance_criteria": criteria
                 }
-                subtasks.append(subtask)
+                for part, start in enumerate(range(0, len(tasks), chunk_size), 1)
+            ]
         else:
             # Just return the original story as a single task
-            subtasks.append(story.raw_data)
+            subtasks = [story.raw_data]
             
         self.logger.info(f"Decomposed story into {len(subtasks)} subtasks")
         return subtasks
@@ -143,17 +244,159 @@ class DualAgentCoordinator:
             # Try one more time with QWEN3 directly
             return await self.qwen3_supervisor.execute_task(subtask)
     
+    async def _execute_subtask_batch(self, subtasks: List[Dict[str, Any]]) -> List[Any]:
+        """Batch function for the BatchingExecutor"""
+        # The Goose API has no batch endpoint, so a batch fans out over the pooled client
+        return await asyncio.gather(
+            *(self.execute_subtask_with_failover(subtask) for subtask in subtasks),
+            return_exceptions=True
+        )
+    
     async def checkpoint_state(self, subtask: Dict[str, Any], result: Dict[str, Any]):
         """Save intermediate state/checkpoint"""
         if self.config.checkpoint_frequency == "per_task":
-            checkpoint_id = f"checkpoint_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-            self.checkpoint_storage[checkpoint_id] = {
-                "subtask": subtask,
+            subtask_ref = self._hasher.hexdigest(subtask)
+            self._subtask_blobs.setdefault(subtask_ref, subtask)
+            
+            # Sequence number rather than a timestamp so concurrent checkpoints never collide
+            checkpoint_id = f"checkpoint_{next(self._checkpoint_seq)}"
+            checkpoint = {
+                "subtask_ref": subtask_ref,
+                "subtask_id": subtask.get("id"),
                 "result": result,
-                "timestamp": datetime.now().isoformat()
+                "ts_ns": time.time_ns()  # formatted only when restored
             }
+            self._remember_checkpoint(checkpoint_id, checkpoint)
+            
+            if self.config.checkpoint_dir:
+                self._journal(checkpoint_id, checkpoint, subtask)
             self.logger.info(f"Checkpoint saved: {checkpoint_id}")
     
+    def _remember_checkpoint(self, checkpoint_id: str, checkpoint: Dict[str, Any]):
+        """Keep the most recent checkpoints in memory; the journal holds the full history"""
+        self.checkpoint_storage[checkpoint_id] = checkpoint
+        subtask_ref = checkpoint["subtask_ref"]
+        self._blob_refs[subtask_ref] = self._blob_refs.get(subtask_ref, 0) + 1
+        if len(self.checkpoint_storage) > self.config.checkpoint_ring_size:
+            evicted = self.checkpoint_storage.pop(next(iter(self.checkpoint_storage)))
+            self._release_blob(evicted["subtask_ref"])
+    
+    def _release_blob(self, subtask_ref: str):
+        """Drop a subtask body once no checkpoint in memory references it"""
+        self._blob_refs[subtask_ref] -= 1
+        if self._blob_refs[subtask_ref] == 0:
+            del self._blob_refs[subtask_ref]
+            self._subtask_blobs.pop(subtask_ref, None)
+            self._journaled_blobs.discard(subtask_ref)
+    
+    def _journal(self, checkpoint_id: str, checkpoint: Dict[str, Any], subtask: Dict[str, Any]):
+        """Queue a checkpoint (with its subtask body, if not yet journaled) for the background writer"""
+        if self._checkpoint_queue is None:
+            self._checkpoint_queue = asyncio.Queue(maxsize=self.config.checkpoint_queue_size)
+        if self._checkpoint_writer is None or self._checkpoint_writer.done():
+            self._checkpoint_writer = asyncio.create_task(self._write_checkpoints())
+        
+        if self._checkpoint_queue.full():
+            # Drop the oldest pending item rather than stall the story; a blob line
+            # dropped with it is written again with the next checkpoint that needs it
+            dropped_ref, _ = self._checkpoint_queue.get_nowait()
+            self._checkpoint_queue.task_done()
+            if dropped_ref is not None:
+                self._journaled_blobs.discard(dropped_ref)
+            self.logger.warning("Checkpoint journal queue full, dropped oldest entry")
+        
+        # Blob and checkpoint lines share a queue item so they are dropped together
+        subtask_ref = checkpoint["subtask_ref"]
+        blob_ref = None
+        lines = []
+        if subtask_ref not in self._journaled_blobs:
+            self._journaled_blobs.add(subtask_ref)
+            blob_ref = subtask_ref
+            lines.append(self._journal_line({"blob": subtask_ref, "subtask": subtask}))
+        lines.append(self._journal_line({"checkpoint": checkpoint_id, **checkpoint}))
+        self._checkpoint_queue.put_nowait((blob_ref, b"".join(lines)))
+    
+    @staticmethod
+    def _journal_line(entry: Dict[str, Any]) -> bytes:
+        return orjson.dumps(entry, option=orjson.OPT_NON_STR_KEYS, default=str) + b"\n"
+    
+    async def _write_checkpoints(self):
+        root = Path(self.config.checkpoint_dir)
+        journal = None
+        try:
+            root.mkdir(parents=True, exist_ok=True)
+            journal = open(root / CHECKPOINT_JOURNAL, 'ab')
+        except OSError as e:
+            # Keep draining so close() can't hang
+            self.logger.error(f"Cannot open checkpoint journal in {root}: {e}")
+        
+        try:
+            while True:
+                lines = [(await self._checkpoint_queue.get())[1]]
+                while not self._checkpoint_queue.empty():
+                    lines.append(self._checkpoint_queue.get_nowait()[1])
+                try:
+                    if journal is not None:
+                        await asyncio.to_thread(self._append_lines, journal, lines)
+                except OSError as e:
+                    self.logger.error(f"Failed to append {len(lines)} checkpoint entries: {e}")
+                finally:
+                    for _ in lines:
+                        self._checkpoint_queue.task_done()
+        finally:
+            if journal is not None:
+                journal.close()
+    
+    @staticmethod
+    def _append_lines(journal, lines: List[bytes]):
+        journal.write(b"".join(lines))
+        journal.flush()
+    
+    def recover_checkpoints(self) -> int:
+        """Replay the checkpoint journal so execute_story skips subtasks already completed"""
+        if not self.config.checkpoint_dir:
+            return 0
+        path = Path(self.config.checkpoint_dir) / CHECKPOINT_JOURNAL
+        if not path.exists():
+            return 0
+        
+        last_seq = 0
+        blobs = {}  # every journaled body; only those the ring references are kept
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    entry = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue  # torn final line from a crash mid-append
+                if "blob" in entry:
+                    blobs[entry["blob"]] = entry["subtask"]
+                elif "checkpoint" in entry:
+                    checkpoint_id = entry.pop("checkpoint")
+                    subtask_ref = entry["subtask_ref"]
+                    self.completed_subtasks[subtask_ref] = entry["result"]
+                    if subtask_ref in blobs:
+                        # Without its body (blob line dropped on overflow) it can't be restored
+                        self._subtask_blobs.setdefault(subtask_ref, blobs[subtask_ref])
+                        self._journaled_blobs.add(subtask_ref)
+                        self._remember_checkpoint(checkpoint_id, entry)
+                    last_seq = max(last_seq, int(checkpoint_id.rsplit("_", 1)[1]))
+        
+        # Continue numbering after the replayed entries
+        self._checkpoint_seq = itertools.count(last_seq + 1)
+        self.logger.info(f"Recovered {len(self.completed_subtasks)} completed subtasks from journal")
+        return len(self.completed_subtasks)
+    
+    def restore_checkpoint(self, checkpoint_id: str) -> Optional[Dict[str, Any]]:
+        """Return a checkpoint with its subtask body rehydrated"""
+        checkpoint = self.checkpoint_storage.get(checkpoint_id)
+        if checkpoint is None:
+            return None
+        return {
+            "subtask": self._subtask_blobs[checkpoint["subtask_ref"]],
+            "result": checkpoint["result"],
+            "timestamp": datetime.fromtimestamp(checkpoint["ts_ns"] / 1e9).isoformat()
+        }
+    
     def merge_results(self, results: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Merge results from multiple subtasks"""
         merged = {
@@ -166,22 +409,31 @@ class DualAgentCoordinator:
         # Try to combine results meaningfully
         combined_output = {}
         for result in results:
-            if isinstance(result, dict) and "result" in result:
-                # Add to combined output
-                result_data = result.get("result", {})
-                # Handle case where result is a string or other non-dict type
-                if isinstance(result_data, dict):
-                    combined_output.update(result_data)
-                elif isinstance(result_data, str):
-                    combined_output[result_data] = True
-                else:
-                    # For other types, convert to string
-                    combined_output[str(result_data)] = True
+            try:
+                result_data = result["result"]
+            except (KeyError, TypeError):
+                continue
+            
+            # Dict results merge in; anything else (QWEN3 returns a string) becomes a flag key
+            if isinstance(result_data, dict):
+                combined_output.update(result_data)
+            else:
+                combined_output[result_data if isinstance(result_data, str) else str(result_data)] = True
         
         merged["combined_result"] = combined_output
         return merged
     
     async def close(self):
         """Close the coordinator"""
-        await self.goose_agent.close()
+        if self.batch_executor is not None:
+            await self.batch_executor.close()
+        if self._checkpoint_writer is not None:
+            # Flush pending checkpoint files before stopping the writer
+            await self._checkpoint_queue.join()
+            self._checkpoint_writer.cancel()
+            self._checkpoint_writer = None
+            self._checkpoint_queue = None
+        if self._goose_agent is not None:
+            await self._goose_agent.close()
+            self._goose_agent = None
         self.logger.info("DualAgentCoordinator closed")
\ No newline at end of file
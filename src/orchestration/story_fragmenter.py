@@ -5,7 +5,8 @@ Breaks large BMAD stories into manageable fragments
 import logging
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
-import copy
+
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -26,7 +27,8 @@ class StoryFragmenter:
     
     def fragment_story(self, story: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Break a large story into manageable fragments"""
-        estimated_tokens = self._estimate_story_tokens(story)
+        story_chars = self._story_chars(story)
+        estimated_tokens = story_chars // 4
         
         # If story is small enough and has few tasks, return as-is
         tasks = story.get("tasks", [])
@@ -45,40 +47,81 @@ class StoryFragmenter:
         
         fragments = []
         fragment_counter = 0
-        
-        # Split tasks into chunks
-        for i in range(0, len(tasks), self.config.max_tasks_per_fragment):
-            task_chunk = tasks[i:i + self.config.max_tasks_per_fragment]
+        chunk = self.config.max_tasks_per_fragment
+        total_fragments = (len(tasks) + chunk - 1) // chunk
+        link_fragments = self.config.create_dependencies and total_fragments > 1
+        previous_id = None
+        
+        # Size each task once; a fragment is the non-task part plus its own tasks
+        task_chars = [self._story_chars(task) for task in tasks]
+        base_chars = max(0, story_chars - sum(task_chars))
+        
+        # Id/name prefixes are the same for every fragment
+        id_prefix = f"{story.get('id', 'story')}_fragment_"
+        name_prefix = f"{story.get('name', 'Story')} - Fragment "
+        
+        # Split tasks into chunks; each fragment depends on the previous one when linking
+        for i in range(0, len(tasks), chunk):
+            end = i + chunk
+            task_chunk = tasks[i:end]
             fragment_counter += 1
             
             # Create fragment
-            fragment = self._create_fragment(story, task_chunk, fragment_counter)
+            fragment_tokens = (base_chars + sum(task_chars[i:end])) // 4
+            fragment = self._create_fragment(
+                story, task_chunk, fragment_counter, fragment_tokens, id_prefix, name_prefix,
+                total_fragments, previous_id
+            )
             fragments.append(fragment)
-        
-        # Add dependencies between fragments if needed
-        if self.config.create_dependencies and len(fragments) > 1:
-            fragments = self._add_fragment_dependencies(fragments)
+            if link_fragments:
+                previous_id = fragment["id"]
         
         self.logger.info(f"Created {len(fragments)} fragments from story")
         return fragments
     
+    def _story_chars(self, value: Any) -> int:
+        """Length of the compact JSON form of a story or task"""
+        return len(orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS, default=str))
+    
     def _estimate_story_tokens(self, story: Dict[str, Any]) -> int:
         """Estimate the number of tokens in a story"""
         # Simple estimation: characters / 4
-        story_str = str(story)
-        return len(story_str) // 4
+        return self._story_chars(story) // 4
+    
+    def _exceeds_limits(self, estimated_tokens: int, task_count: int) -> bool:
+        return (
+            estimated_tokens > self.config.max_story_size or
+            task_count > self.config.max_tasks_per_fragment
+        )
     
-    def _create_fragment(self, original_story: Dict[str, Any], tasks: List[Dict], fragment_id: int) -> Dict[str, Any]:
+    def _create_fragment(
+        self,
+        original_story: Dict[str, Any],
+        tasks: List[Dict],
+        fragment_id: int,
+        estimated_tokens: int,
+        id_prefix: Optional[str] = None,
+        name_prefix: Optional[str] = None,
+        total_fragments: int = 0,
+        previous_id: Optional[str] = None
+    ) -> Dict[str, Any]:
         """Create a fragment from a task chunk"""
-        # Deep copy the original story to preserve structure
-        fragment = copy.deepcopy(original_story)
+        # Shallow copy: nested values (outputs, acceptance criteria, ...) are shared
+        # read-only with the original, and the keys changed below are replaced wholesale
+        fragment = {**original_story}
+        if previous_id is not None:
+            fragment["dependencies"] = [
+                *fragment.get("dependencies", ()),
+                {"fragment_id": previous_id, "type": "sequential"}
+            ]
         
         # Update ID and name
-        original_id = fragment.get("id", "story")
-        fragment["id"] = f"{original_id}_fragment_{fragment_id}"
-        
-        original_name = fragment.get("name", "Story")
-        fragment["name"] = f"{original_name} - Fragment {fragment_id}"
+        if id_prefix is None:
+            id_prefix = f"{fragment.get('id', 'story')}_fragment_"
+        if name_prefix is None:
+            name_prefix = f"{fragment.get('name', 'Story')} - Fragment "
+        fragment["id"] = id_prefix + str(fragment_id)
+        fragment["name"] = name_prefix + str(fragment_id)
         
         # Replace tasks with the chunk
         fragment["tasks"] = tasks
@@ -86,56 +129,26 @@ class StoryFragmenter:
         # Add fragment metadata
         fragment["fragment_metadata"] = {
             "fragment_id": fragment_id,
-            "total_fragments": 0,  # Will be updated later
+            "total_fragments": total_fragments,
             "fragmented_at": "2025-08-19T00:00:00Z",  # Placeholder
-            "estimated_tokens": self._estimate_story_tokens(fragment)
+            "estimated_tokens": estimated_tokens
         }
         
         return fragment
     
-    def _add_fragment_dependencies(self, fragments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Add dependencies between fragments to ensure proper execution order"""
-        if len(fragments) <= 1:
-            return fragments
-        
-        # Update total fragment count in metadata
-        total_fragments = len(fragments)
-        for fragment in fragments:
-            if "fragment_metadata" in fragment:
-                fragment["fragment_metadata"]["total_fragments"] = total_fragments
-        
-        # Add dependencies (each fragment depends on the previous one)
-        for i in range(1, len(fragments)):
-            current_fragment = fragments[i]
-            previous_fragment = fragments[i-1]
-            
-            # Add dependency on previous fragment
-            if "dependencies" not in current_fragment:
-                current_fragment["dependencies"] = []
-            
-            current_fragment["dependencies"].append({
-                "fragment_id": previous_fragment["id"],
-                "type": "sequential"
-            })
-        
-        return fragments
-    
     def can_fragment(self, story: Dict[str, Any]) -> bool:
         """Check if a story can/should be fragmented"""
         estimated_tokens = self._estimate_story_tokens(story)
         tasks = story.get("tasks", [])
         
-        return (
-            estimated_tokens > self.config.max_story_size or
-            len(tasks) > self.config.max_tasks_per_fragment
-        )
+        return self._exceeds_limits(estimated_tokens, len(tasks))
     
     def get_fragmentation_info(self, story: Dict[str, Any]) -> Dict[str, Any]:
         """Get information about how a story would be fragmented"""
         estimated_tokens = self._estimate_story_tokens(story)
         tasks = story.get("tasks", [])
         
-        would_fragment = self.can_fragment(story)
+        would_fragment = self._exceeds_limits(estimated_tokens, len(tasks))
         estimated_fragments = 1
         
         if would_fragment:
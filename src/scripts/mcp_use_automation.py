@@ -3,11 +3,19 @@
 
 import os
 import json
+import asyncio
+import importlib.util
 import logging
-from typing import Dict, Any, Optional
+import weakref
+from typing import Dict, Any, List, Optional
 from pathlib import Path
+import httpx
 from dotenv import load_dotenv
 
+# httpx negotiates HTTP/2 only when the h2 package (httpx[http2]) is installed,
+# and only over TLS; plain http:// servers stay on HTTP/1.1 keep-alive
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
 # This is a simplified MCP Use implementation
 # Replace with actual mcp-use library when available
 class MCPClient:
@@ -17,11 +25,25 @@ class MCPClient:
         self.server_url = server_url
         self.api_key = api_key or os.getenv("OPENAI_API_KEY")
         self.logger = logging.getLogger(__name__)
+        self._client: Optional[httpx.AsyncClient] = None
+        self._sessions = 0  # open connect() calls; the pool closes when the last one disconnects
+        
+    def _ensure_client(self) -> httpx.AsyncClient:
+        # One pooled client per session so tool calls reuse keep-alive connections
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.server_url,
+                timeout=30.0,
+                http2=HTTP2_AVAILABLE,  # concurrent call_tool()s multiplex on one connection
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+            )
+        return self._client
         
     async def connect(self):
         """Connect to MCP server"""
         self.logger.info(f"Connecting to MCP server: {self.server_url}")
-        # Implement actual connection logic
+        self._sessions += 1
+        self._ensure_client()
         return True
         
     async def call_tool(self, tool_name: str, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -30,34 +52,54 @@ class MCPClient:
         
         # In production, this would make actual MCP calls
         # For now, make HTTP requests to FastAPI endpoints
-        import httpx
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.server_url}/{tool_name}",
-                json=params
-            )
-            return response.json()
+        response = await self._ensure_client().post(f"/{tool_name}", json=params)
+        return response.json()
+    
+    async def call_batch(self, calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Call several MCP tools in one request; returns one {id, ok, result|error} per call"""
+        self.logger.info(f"Calling {len(calls)} tools in one batch")
+        response = await self._ensure_client().post("/batch", json={"calls": calls})
+        response.raise_for_status()
+        return response.json()["results"]
     
     async def disconnect(self):
         """Disconnect from MCP server"""
         self.logger.info("Disconnecting from MCP server")
+        self._sessions = max(0, self._sessions - 1)
+        if self._sessions == 0 and self._client is not None:
+            await self._client.aclose()
+            self._client = None
         return True
 
+# Clients shared per event loop (an httpx pool can't outlive the loop it was made on)
+_CLIENT_CACHE: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, MCPClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
 # Load environment variables
 load_dotenv()
 
+# Read once at import; the environment doesn't change while a script runs
+_SERVICE_URLS = {
+    "fastapi": os.getenv("FASTAPI_MCP_URL", "http://localhost:8000"),
+    "bmad": os.getenv("BMAD_MCP_URL", "ws://localhost:8001/mcp"),
+    "reddit": os.getenv("REDDIT_MCP_URL", "ws://localhost:8002/mcp"),
+    "phrase": os.getenv("PHRASE_MCP_URL", "ws://localhost:8003/mcp"),
+}
+_API_KEY = os.getenv("OPENAI_API_KEY")
+
 def get_mcp_client(service: str = "fastapi") -> MCPClient:
     """Get configured MCP client for a service"""
+    url = _SERVICE_URLS.get(service, _SERVICE_URLS["fastapi"])
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return MCPClient(url, api_key=_API_KEY)  # no loop yet, nothing to share with
     
-    service_urls = {
-        "fastapi": os.getenv("FASTAPI_MCP_URL", "http://localhost:8000"),
-        "bmad": os.getenv("BMAD_MCP_URL", "ws://localhost:8001/mcp"),
-        "reddit": os.getenv("REDDIT_MCP_URL", "ws://localhost:8002/mcp"),
-        "phrase": os.getenv("PHRASE_MCP_URL", "ws://localhost:8003/mcp"),
-    }
-    
-    return MCPClient(service_urls.get(service, service_urls["fastapi"]))
+    clients = _CLIENT_CACHE.setdefault(loop, {})
+    if url not in clients:
+        clients[url] = MCPClient(url, api_key=_API_KEY)
+    return clients[url]
 
 # ============================================================================
 # scripts/run_filter_via_mcp.py
@@ -69,6 +111,7 @@ import json
 from datetime import datetime, timedelta
 from pathlib import Path
 import sys
+import orjson
 
 # Add parent directory to path
 sys.path.append(str(Path(__file__).parent.parent))
@@ -125,8 +168,7 @@ async def run_filter(
                 output_path.mkdir(parents=True, exist_ok=True)
                 
                 report_path = output_path / f"filter_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                with open(report_path, 'w') as f:
-                    json.dump(result, f, indent=2)
+                report_path.write_bytes(orjson.dumps(result, option=orjson.OPT_INDENT_2))
                 print(f"  Report saved: {report_path}")
             
             return result
@@ -264,10 +306,23 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from scripts.mcp_client_base import get_mcp_client
 
+def _merge_targeting_results(results: list) -> dict:
+    """Combine per-metro target_local_subs responses into one response"""
+    failed = [r for r in results if not r.get("ok")]
+    if failed:
+        return failed[0]
+    merged = {"ok": True, "metros_targeted": 0, "total_subreddits": 0, "metro_details": {}}
+    for result in results:
+        merged["metros_targeted"] += result.get("metros_targeted", 0)
+        merged["total_subreddits"] += result.get("total_subreddits", 0)
+        merged["metro_details"].update(result.get("metro_details") or {})
+    return merged
+
 async def expand_cities(
     metros: list,
     discover: bool = True,
-    regional_keywords: dict = None
+    regional_keywords: dict = None,
+    per_metro: bool = False
 ):
     """Expand city coverage via MCP"""
     
@@ -287,8 +342,15 @@ async def expand_cities(
         if discover:
             print("Discovering new subreddits enabled")
         
-        # Execute local targeting
-        result = await client.call_tool("target_local_subs", targeting_params)
+        # Execute local targeting, optionally one concurrent call per metro
+        if per_metro and len(metros) > 1:
+            results = await asyncio.gather(*(
+                client.call_tool("target_local_subs", {**targeting_params, "metro_areas": [metro]})
+                for metro in metros
+            ))
+            result = _merge_targeting_results(results)
+        else:
+            result = await client.call_tool("target_local_subs", targeting_params)
         
         # Process results
         if result.get("ok"):
@@ -320,13 +382,16 @@ def main():
                       help="Disable subreddit discovery")
     parser.add_argument("--keywords", type=json.loads,
                       help="Regional keywords as JSON")
+    parser.add_argument("--per-metro", action="store_true",
+                      help="Issue one concurrent request per metro")
     
     args = parser.parse_args()
     
     asyncio.run(expand_cities(
         metros=args.metros,
         discover=not args.no_discover,
-        regional_keywords=args.keywords
+        regional_keywords=args.keywords,
+        per_metro=args.per_metro
     ))
 
 if __name__ == "__main__":
@@ -343,6 +408,7 @@ from datetime import datetime, timedelta
 from pathlib import Path
 import sys
 from typing import Dict, Any
+import orjson
 
 sys.path.append(str(Path(__file__).parent.parent))
 
@@ -371,81 +437,101 @@ async def run_full_pipeline(
         print(f"Date range: {date_start} to {date_end}")
         print("=" * 60)
         
-        # Step 1: Optimize payloads
-        print("\n[1/6] Optimizing Apify payloads...")
         subreddits = ["r/commercialrealestate"] + [f"r/{m}" for m in metros]
         
-        payload_result = await client.call_tool("optimize_payload", {
-            "subreddits": subreddits,
-            "keywords": ["lease", "rent", "property", "commercial", "tenant"],
-            "date_start": date_start,
-            "date_end": date_end,
-            "max_url_length": 512,
-            "optimization_rounds": 3
-        })
+        # One round trip: the server runs independent calls concurrently and feeds
+        # the mined terms into filter_posts via input_from. Steps 4-6 read the files
+        # filter_posts writes, so they wait for it via "after"
+        print("\nRunning pipeline steps...")
+        outcomes = await client.call_batch([
+            {"id": "payload", "tool": "optimize_payload", "args": {
+                "subreddits": subreddits,
+                "keywords": ["lease", "rent", "property", "commercial", "tenant"],
+                "date_start": date_start,
+                "date_end": date_end,
+                "max_url_length": 512,
+                "optimization_rounds": 3
+            }},
+            {"id": "phrases", "tool": "mine_phrases", "args": {
+                "corpus_source": "last_month",
+                "ngram_range": [1, 3],
+                "top_k": 100,
+                "domain_categories": ["financial", "legal", "operational", "market", "development"]
+            }},
+            {"id": "filter", "tool": "filter_posts", "args": {
+                "date_start": date_start,
+                "date_end": date_end,
+                "exclude_keywords": [],
+                "quality_thresholds": {
+                    "min_length": 50,
+                    "max_length": 10000,
+                    "min_score": 1
+                },
+                "semantic_similarity_threshold": 0.4
+            }, "input_from": {"keywords": "$phrases.top_terms[:10].term"}},
+            {"id": "local", "tool": "target_local_subs", "args": {
+                "metro_areas": metros,
+                "discover_new_subs": True,
+                "regional_keywords": {}
+            }, "after": ["filter"]},
+            {"id": "verticals", "tool": "specialize_verticals", "args": {
+                "verticals": verticals,
+                "custom_lexicons": {},
+                "conflict_resolution": True
+            }, "after": ["filter"]},
+            {"id": "dual_sort", "tool": "execute_dual_sort", "args": {
+                "timeframe_days": 30,
+                "sort_strategies": ["new", "relevance"],
+                "deduplication": True,
+                "backfill_months": 0
+            }, "after": ["filter"]}
+        ])
+        
+        # A failed call becomes an error record for that step only
+        step_results = {}
+        for outcome in outcomes:
+            if outcome.get("ok"):
+                step_results[outcome["id"]] = outcome["result"]
+            else:
+                print(f"  ✗ {outcome['id']} failed: {outcome.get('error')}")
+                step_results[outcome["id"]] = {"ok": False, "error": outcome.get("error")}
+        payload_result = step_results["payload"]
+        phrase_result = step_results["phrases"]
+        filter_result = step_results["filter"]
+        local_result = step_results["local"]
+        vertical_result = step_results["verticals"]
+        dual_result = step_results["dual_sort"]
         results['payload_optimization'] = payload_result
+        results['phrase_mining'] = phrase_result
+        results['filtering'] = filter_result
+        results['local_targeting'] = local_result
+        results['vertical_specialization'] = vertical_result
+        results['dual_sort'] = dual_result
         
+        # Step 1: Optimize payloads
+        print("\n[1/6] Optimizing Apify payloads...")
         if payload_result.get('optimized_payload'):
             print(f"  ✓ Payload optimized, size: {payload_result['final_metrics']['url_length']} chars")
         
         # Step 2: Mine phrases
         print("\n[2/6] Mining phrases with TF-IDF...")
-        phrase_result = await client.call_tool("mine_phrases", {
-            "corpus_source": "last_month",
-            "ngram_range": [1, 3],
-            "top_k": 100,
-            "domain_categories": ["financial", "legal", "operational", "market", "development"]
-        })
-        results['phrase_mining'] = phrase_result
-        
         if phrase_result.get('ok'):
             print(f"  ✓ Extracted {phrase_result['total_terms_extracted']} terms")
-            top_terms = [t['term'] for t in phrase_result.get('top_terms', [])[:10]]
-        else:
-            top_terms = []
         
         # Step 3: Filter posts
         print("\n[3/6] Filtering posts...")
-        filter_result = await client.call_tool("filter_posts", {
-            "date_start": date_start,
-            "date_end": date_end,
-            "keywords": top_terms,
-            "exclude_keywords": [],
-            "quality_thresholds": {
-                "min_length": 50,
-                "max_length": 10000,
-                "min_score": 1
-            },
-            "semantic_similarity_threshold": 0.4
-        })
-        results['filtering'] = filter_result
-        
         if filter_result.get('ok'):
             print(f"  ✓ Filtered {filter_result['filtered_count']} posts")
             print(f"    Retention rate: {filter_result['retention_rate']:.2%}")
         
         # Step 4: Target local subs
         print("\n[4/6] Targeting local subreddits...")
-        local_result = await client.call_tool("target_local_subs", {
-            "metro_areas": metros,
-            "discover_new_subs": True,
-            "regional_keywords": {}
-        })
-        results['local_targeting'] = local_result
-        
         if local_result.get('ok'):
             print(f"  ✓ Targeted {local_result['metros_targeted']} metros")
             print(f"    Total subreddits: {local_result['total_subreddits']}")
         
         # Step 5: Specialize verticals
         print("\n[5/6] Analyzing verticals...")
-        vertical_result = await client.call_tool("specialize_verticals", {
-            "verticals": verticals,
-            "custom_lexicons": {},
-            "conflict_resolution": True
-        })
-        results['vertical_specialization'] = vertical_result
-        
         if vertical_result.get('ok'):
             print(f"  ✓ Processed {vertical_result['verticals_processed']} verticals")
             
@@ -457,14 +543,6 @@ async def run_full_pipeline(
         
         # Step 6: Execute dual-sort
         print("\n[6/6] Executing dual-sort strategy...")
-        dual_result = await client.call_tool("execute_dual_sort", {
-            "timeframe_days": 30,
-            "sort_strategies": ["new", "relevance"],
-            "deduplication": True,
-            "backfill_months": 0
-        })
-        results['dual_sort'] = dual_result
-        
         if dual_result.get('ok'):
             print(f"  ✓ Collected {dual_result['total_posts_collected']} posts")
             print(f"    Unique posts: {dual_result['unique_posts']}")
@@ -510,11 +588,10 @@ async def run_full_pipeline(
             
             # Save full results
             results_path = output_path / f"pipeline_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(results_path, 'w') as f:
-                json.dump({
-                    'summary': summary,
-                    'detailed_results': results
-                }, f, indent=2, default=str)
+            results_path.write_bytes(orjson.dumps({
+                'summary': summary,
+                'detailed_results': results
+            }, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS, default=str))
             
             print(f"\nResults saved to: {results_path}")
         
@@ -574,6 +651,7 @@ from scripts.run_filter_via_mcp import run_filter
 from scripts.refresh_tfidf_via_mcp import refresh_tfidf
 from scripts.expand_cities_via_mcp import expand_cities
 from scripts.run_full_pipeline import run_full_pipeline
+from scripts.mcp_client_base import get_mcp_client
 
 # Configure logging
 logging.basicConfig(
@@ -681,10 +759,19 @@ class CREScheduler:
     
     def run_async_job(self, coro):
         """Helper to run async job in sync context"""
+        async def with_shared_client():
+            # Hold a session for the whole job so back-to-back scripts reuse one pool
+            client = get_mcp_client("fastapi")
+            await client.connect()
+            try:
+                await coro
+            finally:
+                await client.disconnect()
+        
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
         try:
-            loop.run_until_complete(coro)
+            loop.run_until_complete(with_shared_client())
         finally:
             loop.close()
     
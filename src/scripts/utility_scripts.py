@@ -68,6 +68,7 @@ import logging
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
+import orjson
 import pandas as pd
 import click
 
@@ -149,22 +150,26 @@ class DataManager:
         
         return cleaned_count
     
+    def _iter_filtered_records(self):
+        """Stream records from every filtered_*.jsonl without building DataFrames"""
+        for file_path in self.processed_path.glob("filtered_*.jsonl"):
+            with open(file_path, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        yield orjson.loads(line)
+    
     def merge_filtered_data(self, output_file: str = "merged_filtered.jsonl") -> Path:
         """Merge all filtered data files"""
-        merged_data = []
+        # Remove duplicates as we go, keeping the first record seen per id
+        merged = {}
+        for record in self._iter_filtered_records():
+            merged.setdefault(record.get('id'), record)
         
-        for file_path in self.processed_path.glob("filtered_*.jsonl"):
-            df = pd.read_json(file_path, lines=True)
-            merged_data.append(df)
-        
-        if merged_data:
-            combined = pd.concat(merged_data, ignore_index=True)
-            # Remove duplicates
-            combined = combined.drop_duplicates(subset=['id'], keep='first')
-            
+        if merged:
             output_path = self.processed_path / output_file
-            combined.to_json(output_path, orient='records', lines=True)
-            logger.info(f"Merged {len(merged_data)} files into {output_path}")
+            with open(output_path, 'wb') as f:
+                f.writelines(orjson.dumps(record) + b'\n' for record in merged.values())
+            logger.info(f"Merged {len(merged)} unique records into {output_path}")
             return output_path
         
         return None
@@ -172,18 +177,16 @@ class DataManager:
     def export_for_analysis(self, format: str = "parquet") -> Path:
         """Export processed data for analysis"""
         # Collect all processed data
-        all_data = []
+        records = list(self._iter_filtered_records())
         
-        for file_path in self.processed_path.glob("filtered_*.jsonl"):
-            df = pd.read_json(file_path, lines=True)
-            all_data.append(df)
-        
-        if all_data:
-            combined = pd.concat(all_data, ignore_index=True)
-            
+        if records:
             # Export based on format
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             
+            # One frame over all records, so columns missing from some files and
+            # mixed int/float values are unified rather than inferred from the first row
+            combined = pd.DataFrame.from_records(records)
+            
             if format == "parquet":
                 output_path = self.base_path / f"export_{timestamp}.parquet"
                 combined.to_parquet(output_path)
@@ -196,7 +199,7 @@ class DataManager:
             else:
                 raise ValueError(f"Unsupported format: {format}")
             
-            logger.info(f"Exported {len(combined)} records to {output_path}")
+            logger.info(f"Exported {len(records)} records to {output_path}")
             return output_path
         
         return None
@@ -0,0 +1,97 @@
+"""
+SQLite Store
+Batched writes for the posts/keywords tables created by setup.py
+"""
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from typing import Any, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = "reddit08.db"
+
+# Column order expected by bulk_insert_posts
+POST_COLUMNS = ('platform', 'post_id', 'title', 'content', 'author', 'created_at', 'source_url', 'metadata')
+
+INSERT_POSTS_SQL = (
+    f"INSERT OR IGNORE INTO posts({', '.join(POST_COLUMNS)}) "
+    f"VALUES ({', '.join('?' for _ in POST_COLUMNS)})"
+)
+
+UPSERT_KEYWORDS_SQL = (
+    "INSERT INTO keywords(term, category) VALUES (?, ?) "
+    "ON CONFLICT(term) DO UPDATE SET frequency = frequency + 1, last_seen = CURRENT_TIMESTAMP"
+)
+
+def connect(db_path: str = DEFAULT_DB_PATH) -> sqlite3.Connection:
+    """Open a connection with the per-connection pragmas (WAL itself is set by setup.py)"""
+    conn = sqlite3.connect(db_path)
+    conn.executescript("""
+        PRAGMA synchronous=NORMAL;
+        PRAGMA busy_timeout=5000;
+        PRAGMA cache_size=-65536;
+        PRAGMA temp_store=MEMORY;
+    """)
+    return conn
+
+def bulk_insert_posts(conn: sqlite3.Connection, rows: Iterable[Sequence[Any]]) -> int:
+    """Insert post rows (POST_COLUMNS order) in one transaction; duplicates are skipped"""
+    with conn:
+        cursor = conn.executemany(INSERT_POSTS_SQL, rows)
+    return cursor.rowcount
+
+def bulk_upsert_keywords(conn: sqlite3.Connection, rows: Iterable[Tuple[str, Optional[str]]]) -> int:
+    """Upsert (term, category) rows in one transaction, bumping frequency on repeats"""
+    with conn:
+        cursor = conn.executemany(UPSERT_KEYWORDS_SQL, rows)
+    return cursor.rowcount
+
+@dataclass
+class BufferConfig:
+    """Configuration for BufferedPostWriter"""
+    max_rows: int = 1000
+    max_delay: float = 5.0  # seconds
+
+class BufferedPostWriter:
+    """Accumulates post and keyword rows, flushing them in batches"""
+
+    def __init__(self, conn: sqlite3.Connection, config: Optional[BufferConfig] = None):
+        self.conn = conn
+        self.config = config or BufferConfig()
+        self.post_rows: List[Sequence[Any]] = []
+        self.keyword_rows: List[Tuple[str, Optional[str]]] = []
+        self.last_flush = time.monotonic()
+
+    def add_post(self, row: Sequence[Any]) -> None:
+        """Queue a post row, flushing when a threshold is reached"""
+        self.post_rows.append(row)
+        self._maybe_flush()
+
+    def add_keyword(self, term: str, category: Optional[str] = None) -> None:
+        """Queue a keyword occurrence, flushing when a threshold is reached"""
+        self.keyword_rows.append((term, category))
+        self._maybe_flush()
+
+    def _maybe_flush(self) -> None:
+        pending = len(self.post_rows) + len(self.keyword_rows)
+        if (pending >= self.config.max_rows or
+                time.monotonic() - self.last_flush >= self.config.max_delay):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write all queued rows"""
+        if self.post_rows:
+            bulk_insert_posts(self.conn, self.post_rows)
+            self.post_rows = []
+        if self.keyword_rows:
+            bulk_upsert_keywords(self.conn, self.keyword_rows)
+            self.keyword_rows = []
+        self.last_flush = time.monotonic()
+
+    def __enter__(self) -> "BufferedPostWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.flush()
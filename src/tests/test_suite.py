@@ -105,6 +105,21 @@ class TestPayloadOptimization:
         # Should identify missing terms
         assert len(metrics['coverage_gaps']) > 0
     
+    @pytest.mark.asyncio
+    async def test_optimization_stops_when_converged(self, optimizer):
+        """Test that rounds stop once a round leaves the queries unchanged"""
+        request = PayloadOptimizationRequest(
+            subreddits=["r/commercialrealestate"],
+            keywords=["office"],
+            date_start="2024-01-01",
+            date_end="2024-01-31",
+            optimization_rounds=5
+        )
+        
+        result = await optimizer.optimize_payload(request)
+        
+        assert len(result['optimization_history']) < request.optimization_rounds
+    
     @pytest.mark.asyncio
     async def test_start_url_generation(self, optimizer, sample_request):
         """Test subreddit-specific start URL generation"""
@@ -414,7 +429,14 @@ import asyncio
 from datetime import datetime, timedelta
 from unittest.mock import patch, MagicMock
 
-from mcp.fastapi_app.main import app
+from mcp.fastapi_app.main import (
+    app,
+    BatchCall,
+    batch_layers,
+    resolve_batch_ref,
+    _run_batch_call
+)
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
 
 class TestIntegration:
@@ -501,6 +523,70 @@ class TestIntegration:
             # Should complete even with mocked data
             assert response.status_code in [200, 500]  # May fail due to mocking
 
+class TestBatch:
+    """Test suite for the /batch endpoint helpers"""
+    
+    def test_resolve_batch_ref(self):
+        """Test references slice lists and map keys over them"""
+        results = {'1': {'top_terms': [{'term': 'lease'}, {'term': 'rent'}, {'term': 'tenant'}]}}
+        
+        assert resolve_batch_ref('$1.top_terms[:2].term', results) == ['lease', 'rent']
+        assert resolve_batch_ref('$1.missing', results) == []
+    
+    def test_resolve_batch_ref_errors(self):
+        """Test malformed references and references to failed calls"""
+        with pytest.raises(ValueError):
+            resolve_batch_ref('1.top_terms', {'1': {}})
+        with pytest.raises(ValueError):
+            resolve_batch_ref('$2.top_terms', {'1': {}})
+    
+    def test_batch_layers(self):
+        """Test input_from and after edges both order calls"""
+        calls = [
+            BatchCall(id='filter', tool='filter_posts', input_from={'keywords': '$phrases.top_terms'}),
+            BatchCall(id='phrases', tool='mine_phrases'),
+            BatchCall(id='verticals', tool='specialize_verticals', after=['filter']),
+            BatchCall(id='payload', tool='optimize_payload')
+        ]
+        
+        layers = [[str(call.id) for call in layer] for layer in batch_layers(calls)]
+        
+        assert layers == [['phrases', 'payload'], ['filter'], ['verticals']]
+    
+    def test_batch_layers_rejects_invalid(self):
+        """Test duplicate ids, unknown references and cycles are rejected"""
+        duplicate = [BatchCall(id=1, tool='mine_phrases'), BatchCall(id='1', tool='mine_phrases')]
+        unknown = [BatchCall(id=1, tool='filter_posts', input_from={'keywords': '$9.top_terms'})]
+        unknown_after = [BatchCall(id=1, tool='filter_posts', after=[9])]
+        cycle = [
+            BatchCall(id='a', tool='filter_posts', input_from={'keywords': '$b.top_terms'}),
+            BatchCall(id='b', tool='filter_posts', after=['a'])
+        ]
+        
+        for calls in (duplicate, unknown, unknown_after, cycle):
+            with pytest.raises(HTTPException) as exc_info:
+                batch_layers(calls)
+            assert exc_info.value.status_code == 400
+    
+    @pytest.mark.asyncio
+    async def test_failed_dependency_fails_dependent(self):
+        """Test a call referencing a failed call fails without running"""
+        techniques = MagicMock()
+        call = BatchCall(id=2, tool='filter_posts', input_from={'keywords': '$1.top_terms'})
+        
+        outcome = await _run_batch_call(call, {}, techniques)
+        
+        assert outcome['ok'] is False
+        assert 'did not succeed' in outcome['error']
+        techniques.filter_engine.filter_posts.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_unknown_tool(self):
+        """Test an unknown tool becomes an error record"""
+        outcome = await _run_batch_call(BatchCall(id=1, tool='nope'), {}, MagicMock())
+        
+        assert outcome == {'id': 1, 'ok': False, 'error': 'Unknown tool: nope'}
+
 # ============================================================================
 # tests/test_mcp_server.py
 """Tests for native MCP server"""
@@ -592,6 +678,58 @@ class TestMCPServer:
             result = await server._handle_filter_posts(params)
             
             assert isinstance(result, dict)
+    
+    @pytest.mark.asyncio
+    async def test_pipeline_stage_cache(self):
+        """Test repeated stage params reuse the cached result"""
+        server = CREIntelligenceMCPServer(port=8888)
+        calls = []
+        
+        async def handler(params):
+            calls.append(params)
+            return {'ok': True}
+        
+        await server._cached_stage('stage', handler, {'a': 1, 'b': [2]})
+        await server._cached_stage('stage', handler, {'b': [2], 'a': 1})
+        
+        assert len(calls) == 1
+        assert server.pipeline_cache.hits == 1
+    
+    @pytest.mark.asyncio
+    async def test_pipeline_cache_follows_filtered_output(self):
+        """Test a new date window isn't served steps 4-6 computed before its filtered file"""
+        server = CREIntelligenceMCPServer(port=8888)
+        vertical_calls = []
+        
+        async def ok(params):
+            return {'ok': True}
+        
+        async def filter_posts(params):
+            return {'ok': True, 'output_path': f"filtered_{params['date_start']}.jsonl"}
+        
+        async def specialize(params):
+            vertical_calls.append(params)
+            return {'ok': True, 'run': len(vertical_calls)}
+        
+        server._handle_optimize_payload = ok
+        server._handle_mine_phrases = ok
+        server._handle_filter_posts = filter_posts
+        server._handle_target_local_subs = ok
+        server._handle_specialize_verticals = specialize
+        server._handle_execute_dual_sort = ok
+        
+        def request(date_start):
+            return {'metros': ['nyc'], 'verticals': ['office'], 'date_start': date_start, 'date_end': '2024-01-31'}
+        
+        first = await server._handle_full_pipeline(request('2024-01-01'))
+        second = await server._handle_full_pipeline(request('2024-01-15'))
+        again = await server._handle_full_pipeline(request('2024-01-01'))
+        
+        assert first['ok'] and second['ok'] and again['ok']
+        assert len(vertical_calls) == 2
+        assert second['results']['vertical_specialization']['run'] == 2
+        # Same window hits the cached filtering output, so its vertical result is reused
+        assert again['results']['vertical_specialization']['run'] == 1
 
 # ============================================================================
 # .github/workflows/ci.yml
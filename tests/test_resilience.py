@@ -11,6 +11,7 @@ import httpx
 # Import our resilience components
 from src.goose.resilient_agent import ResilientGooseAgent, ResilientAgentConfig
 from src.orchestration.dual_agent_coordinator import DualAgentCoordinator, DualAgentConfig
+from src.orchestration.batching import BatchingExecutor, BatchConfig
 from src.orchestration.circuit_breaker import CircuitBreaker, CircuitBreakerOpen
 from src.context.sliding_window_manager import SlidingWindowContextManager, ContextConfig
 from src.orchestration.story_fragmenter import StoryFragmenter, FragmentationConfig
@@ -156,6 +157,27 @@ class TestResilientGooseAgent:
         assert result["status"] == "success"
         assert result["result"] == "qwen3_fallback"
 
+    def test_shared_client_per_loop_and_settings(self):
+        """Test agents share a pool only on the same loop with the same settings"""
+        async def make_agents():
+            agents = [
+                ResilientGooseAgent(ResilientAgentConfig()),
+                ResilientGooseAgent(ResilientAgentConfig()),
+                ResilientGooseAgent(ResilientAgentConfig(timeout=5))
+            ]
+            clients = [agent.http_client for agent in agents]
+            for agent in agents:
+                await agent.close()
+            return clients
+        
+        first = asyncio.run(make_agents())
+        second = asyncio.run(make_agents())
+        
+        assert first[0] is first[1]
+        assert first[0] is not first[2]
+        assert first[0] is not second[0]
+        assert all(client.is_closed for client in first + second)
+
 class TestDualAgentCoordinator:
     """Tests for DualAgentCoordinator"""
     
@@ -191,6 +213,87 @@ class TestDualAgentCoordinator:
                     assert result["status"] == "success"
                     assert "results" in result
 
+    @pytest.mark.asyncio
+    async def test_checkpoint_journal_recovery(self, tmp_path):
+        """Test recovery replays the journal and skips only unchanged subtasks"""
+        config = DualAgentConfig(checkpoint_dir=str(tmp_path))
+        coordinator = DualAgentCoordinator(config)
+        subtasks = [{"id": "story_part_1", "tasks": [1]}, {"id": "story_part_2", "tasks": [2]}]
+        for i, subtask in enumerate(subtasks):
+            await coordinator.checkpoint_state(subtask, {"status": "success", "result": i})
+        await coordinator.close()
+        
+        recovered = DualAgentCoordinator(config)
+        assert recovered.recover_checkpoints() == 2
+        assert recovered.restore_checkpoint("checkpoint_2")["subtask"] == subtasks[1]
+        
+        # Same id with different content is a different subtask
+        changed = {"id": "story_part_1", "tasks": [1, 99]}
+        assert recovered._hasher.hexdigest(subtasks[0]) in recovered.completed_subtasks
+        assert recovered._hasher.hexdigest(changed) not in recovered.completed_subtasks
+        
+        # Numbering continues after the replayed checkpoints
+        await recovered.checkpoint_state(changed, {"status": "success"})
+        assert "checkpoint_3" in recovered.checkpoint_storage
+        await recovered.close()
+    
+    @pytest.mark.asyncio
+    async def test_checkpoint_journal_overflow_keeps_blobs(self, tmp_path):
+        """Test a dropped queue item doesn't leave later checkpoints without their subtask"""
+        config = DualAgentConfig(checkpoint_dir=str(tmp_path), checkpoint_queue_size=1)
+        coordinator = DualAgentCoordinator(config)
+        subtask = {"id": "story_part_1", "tasks": [1]}
+        # No await point between these, so the first item is dropped before it is written
+        await coordinator.checkpoint_state(subtask, {"result": 1})
+        await coordinator.checkpoint_state(subtask, {"result": 2})
+        await coordinator.close()
+        
+        recovered = DualAgentCoordinator(config)
+        recovered.recover_checkpoints()
+        assert recovered.restore_checkpoint("checkpoint_1") is None
+        assert recovered.restore_checkpoint("checkpoint_2")["subtask"] == subtask
+    
+    def test_checkpoint_journal_built_outside_running_loop(self, tmp_path):
+        """Test a coordinator constructed before asyncio.run journals and closes cleanly"""
+        coordinator = DualAgentCoordinator(DualAgentConfig(checkpoint_dir=str(tmp_path)))
+        
+        async def run():
+            await coordinator.checkpoint_state({"id": "part_1"}, {"result": 1})
+            await asyncio.sleep(0.01)  # let the writer go idle on the queue
+            await coordinator.checkpoint_state({"id": "part_2"}, {"result": 2})
+            await coordinator.close()
+        
+        asyncio.run(run())
+        assert DualAgentCoordinator(DualAgentConfig(checkpoint_dir=str(tmp_path))).recover_checkpoints() == 2
+    
+    def test_checkpoint_ring_releases_blobs(self):
+        """Test subtask bodies are dropped with the last checkpoint referencing them"""
+        coordinator = DualAgentCoordinator(DualAgentConfig(checkpoint_ring_size=2))
+        for i in range(5):
+            asyncio.run(coordinator.checkpoint_state({"id": f"part_{i}"}, {"result": i}))
+        
+        assert list(coordinator.checkpoint_storage) == ["checkpoint_4", "checkpoint_5"]
+        assert len(coordinator._subtask_blobs) == 2
+
+class TestBatchingExecutor:
+    """Tests for BatchingExecutor"""
+    
+    def test_built_outside_running_loop(self):
+        """Test an executor constructed before asyncio.run still serves submits"""
+        async def double(items):
+            return [item * 2 for item in items]
+        
+        executor = BatchingExecutor(double, BatchConfig(max_wait_ms=1))
+        
+        async def run():
+            results = await asyncio.wait_for(asyncio.gather(executor.submit(21), executor.submit(1)), 3)
+            await executor.close()
+            return results
+        
+        assert asyncio.run(run()) == [42, 2]
+        # Usable again from a fresh loop after close()
+        assert asyncio.run(run()) == [42, 2]
+
 class TestCircuitBreaker:
     """Tests for CircuitBreaker"""
     
@@ -248,6 +351,17 @@ class TestContextManager:
         # Should be pruned
         assert context_manager.get_total_tokens() <= context_manager.config.max_tokens
 
+    def test_running_token_total_matches_contents(self, context_manager):
+        """Test running token total stays in sync through eviction and pruning"""
+        for i in range(15):  # Overflows max_context_items and max_tokens
+            context_manager.add_context("y" * (40 * i), "normal")
+        context_manager.add_context("critical_content", "critical")
+        context_manager.add_context("critical_content", "critical")  # Duplicate, skipped
+
+        expected = sum(item["tokens"] for item in context_manager.context_window)
+        expected += sum(item["tokens"] for item in context_manager.priority_context.values())
+        assert context_manager.get_total_tokens() == expected
+
 class TestStoryFragmenter:
     """Tests for StoryFragmenter"""
     
@@ -313,6 +427,55 @@ class TestIncrementalKnowledgeBase:
         knowledge_base.apply_delta({"-new": None})
         assert knowledge_base.get_knowledge("new") is None
 
+    def test_query_uses_index_after_deltas(self, knowledge_base):
+        """Test indexed queries track adds, merges and removals"""
+        knowledge_base.apply_delta({
+            "+a": {"type": "lease", "city": "austin"},
+            "+b": {"type": "sale", "city": "austin"},
+            "+c": {"type": "lease", "city": "dallas"}
+        })
+        assert set(knowledge_base.query_knowledge({"type": "lease"})) == {"a", "c"}
+
+        knowledge_base.apply_delta({"~b": {"type": "lease"}, "-c": None})
+        assert set(knowledge_base.query_knowledge({"type": "lease", "city": "austin"})) == {"a", "b"}
+        assert knowledge_base.query_knowledge({"city": "dallas"}) == {}
+
+    @pytest.mark.asyncio
+    async def test_torn_delta_line_recovery(self, tmp_path):
+        """Test a torn final log line is dropped without losing later deltas"""
+        config = KnowledgeConfig(storage_path=str(tmp_path))
+        kb = IncrementalKnowledgeBase(config)
+        await kb.update_incremental({"a": 1})
+        kb.close()
+        with open(tmp_path / "delta_log.ndjson", "ab") as f:
+            f.write(b'{"delta": {"b"')  # crash mid-append
+        
+        kb = IncrementalKnowledgeBase(config)
+        assert kb.get_knowledge() == {"a": 1}
+        await kb.update_incremental({"c": 3})
+        kb.close()
+        
+        kb = IncrementalKnowledgeBase(config)
+        assert kb.get_knowledge() == {"a": 1, "c": 3}
+        kb.close()
+    
+    @pytest.mark.asyncio
+    async def test_rollback_to_checkpoint(self, tmp_path):
+        """Test rollback drops later deltas, including after a reload"""
+        config = KnowledgeConfig(storage_path=str(tmp_path))
+        kb = IncrementalKnowledgeBase(config)
+        for i in range(3):
+            await kb.update_incremental({f"k{i}": i})
+        
+        assert await kb.rollback_to_checkpoint(0)
+        assert kb.get_knowledge() == {"k0": 0}
+        assert not await kb.rollback_to_checkpoint(2)
+        kb.close()
+        
+        kb = IncrementalKnowledgeBase(config)
+        assert kb.get_knowledge() == {"k0": 0}
+        kb.close()
+
 class TestAgentMonitor:
     """Tests for AgentMonitor"""
     
@@ -353,6 +516,19 @@ class TestAgentMonitor:
         
         assert health.is_degraded()
         assert health.status == "degraded"
+    
+    @pytest.mark.asyncio
+    async def test_window_stats(self, agent_monitor):
+        """Test rolling window aggregates"""
+        for response_time in (100, 200, 300):
+            async def checker():
+                return {"response_time": response_time, "success": True}
+            await agent_monitor.check_agent_health(checker)
+        
+        stats = agent_monitor.get_window_stats()["response_times"]
+        assert stats["samples"] == 3
+        assert stats["mean"] == pytest.approx(200)
+        assert stats["p95"] == pytest.approx(300)
 
 if __name__ == "__main__":
     pytest.main([__file__])
\ No newline at end of file
@@ -0,0 +1,84 @@
+"""
+SQLite Store Tests
+Tests for batched post/keyword writes against the setup.py schema
+"""
+import pytest
+from unittest.mock import patch
+
+from setup import setup_database
+from src.storage.sqlite_store import (
+    BufferConfig,
+    BufferedPostWriter,
+    bulk_insert_posts,
+    bulk_upsert_keywords,
+    connect
+)
+
+def post_row(post_id: str, title: str = "title"):
+    """Row in POST_COLUMNS order"""
+    return ("reddit", post_id, title, "content", "author", "2024-01-01", "https://reddit.com", "{}")
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    """Connection to a freshly set up database"""
+    monkeypatch.chdir(tmp_path)
+    setup_database()
+    connection = connect(str(tmp_path / "reddit08.db"))
+    yield connection
+    connection.close()
+
+class TestBulkWrites:
+    """Tests for the bulk insert/upsert helpers"""
+
+    def test_insert_posts_skips_duplicates(self, conn):
+        """Test duplicate (platform, post_id) rows are ignored, keeping the first"""
+        inserted = bulk_insert_posts(conn, [post_row("a", "first"), post_row("b"), post_row("a", "second")])
+
+        assert inserted == 2
+        rows = conn.execute("SELECT post_id, title FROM posts ORDER BY post_id").fetchall()
+        assert rows == [("a", "first"), ("b", "title")]
+
+    def test_upsert_keywords_increments_frequency(self, conn):
+        """Test repeated terms bump frequency instead of inserting again"""
+        bulk_upsert_keywords(conn, [("lease", "financial"), ("rent", None)])
+        bulk_upsert_keywords(conn, [("lease", "financial"), ("lease", "financial")])
+
+        rows = dict(conn.execute("SELECT term, frequency FROM keywords").fetchall())
+        assert rows == {"lease": 3, "rent": 1}
+
+class TestBufferedPostWriter:
+    """Tests for BufferedPostWriter flushing"""
+
+    def test_flushes_at_max_rows(self, conn):
+        """Test queued rows are written once the row threshold is reached"""
+        writer = BufferedPostWriter(conn, BufferConfig(max_rows=3, max_delay=3600))
+        writer.add_post(post_row("a"))
+        writer.add_keyword("lease")
+        assert conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0] == 0
+
+        writer.add_post(post_row("b"))
+
+        assert conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0] == 2
+        assert conn.execute("SELECT COUNT(*) FROM keywords").fetchone()[0] == 1
+        assert writer.post_rows == [] and writer.keyword_rows == []
+
+    def test_flushes_after_max_delay(self, conn):
+        """Test queued rows are written once max_delay has passed"""
+        with patch("src.storage.sqlite_store.time.monotonic", return_value=100.0):
+            writer = BufferedPostWriter(conn, BufferConfig(max_rows=1000, max_delay=5.0))
+            writer.add_post(post_row("a"))
+        assert conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0] == 0
+
+        with patch("src.storage.sqlite_store.time.monotonic", return_value=105.0):
+            writer.add_post(post_row("b"))
+
+        assert conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0] == 2
+
+    def test_context_manager_flushes(self, conn):
+        """Test leaving the context writes whatever is still queued"""
+        with BufferedPostWriter(conn, BufferConfig(max_rows=1000, max_delay=3600)) as writer:
+            writer.add_post(post_row("a"))
+            writer.add_keyword("rent", "financial")
+
+        assert conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0] == 1
+        assert conn.execute("SELECT frequency FROM keywords WHERE term = 'rent'").fetchone()[0] == 1